@@ -2,6 +2,8 @@
 ASGI config for easyShop project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Production serves this entry point (see Procfile) so the async live event stream
+(shop.views.event_stream) can hold many idle connections per worker.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
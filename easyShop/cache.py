@@ -0,0 +1,43 @@
+"""
+CACHES['default'] from a CACHE_URL.
+
+    file:///var/cache/easyshop   (absolute) or file://cache (relative to the project)
+    redis://localhost:6379/0     (needs the redis package)
+    locmem://                    (per process: one worker or tests)
+    dummy://                     (caching off)
+
+The cache has to be shared by every gunicorn worker: a file cache does that on
+one box, Redis across boxes.
+"""
+from pathlib import Path
+from urllib.parse import urlsplit
+
+BACKENDS = {
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'rediss': 'django.core.cache.backends.redis.RedisCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def cache_from_url(url, base_dir, key_prefix='', timeout=300, max_entries=10000):
+    """Django cache settings for url."""
+    parts = urlsplit(url)
+    if parts.scheme not in BACKENDS:
+        raise ValueError(f'Unsupported CACHE_URL scheme: {parts.scheme!r}')
+    settings = {
+        'BACKEND': BACKENDS[parts.scheme],
+        'KEY_PREFIX': key_prefix,
+        'TIMEOUT': timeout,
+    }
+    if parts.scheme == 'file':
+        path = parts.netloc + parts.path
+        settings['LOCATION'] = str(Path(base_dir) / path) if not path.startswith('/') else path
+        settings['OPTIONS'] = {'MAX_ENTRIES': max_entries}
+    elif parts.scheme in ('redis', 'rediss'):
+        settings['LOCATION'] = url
+    elif parts.scheme == 'locmem':
+        settings['LOCATION'] = parts.netloc
+        settings['OPTIONS'] = {'MAX_ENTRIES': max_entries}
+    return settings
@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .cache import cache_from_url
+from .database import database_from_url
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -80,14 +84,62 @@ WSGI_APPLICATION = 'easyShop.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLITE_PROFILE=production (set in the Procfile) runs SQLite in WAL mode so readers
+# never wait for a writer, and starts write transactions with BEGIN IMMEDIATE so
+# concurrent writers queue on busy_timeout instead of failing with "database is
+# locked" when a read transaction tries to upgrade. synchronous=NORMAL is safe
+# with WAL (a power cut can lose the last commits, never corrupt the file).
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'default')
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 20000))
+SQLITE_PRODUCTION_OPTIONS = {
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000,
+    'init_command': ';'.join([
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}',
+        f"PRAGMA mmap_size={int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+        # Negative cache_size is in KiB: 64 MB of page cache per connection
+        f"PRAGMA cache_size=-{int(os.environ.get('SQLITE_CACHE_KB', 64 * 1024))}",
+        'PRAGMA temp_store=MEMORY',
+    ]),
+}
+
+# DATABASE_URL picks the database (see easyShop/database.py); without it the app
+# keeps using db.sqlite3 next to manage.py. For PostgreSQL, DB_POOL=1 (default)
+# uses Django's psycopg pool, DB_POOL=0 persistent connections kept for
+# DB_CONN_MAX_AGE seconds with health checks. The test suite runs on whichever
+# database this selects, e.g. DATABASE_URL=postgres://localhost/easyshop.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_from_url(
+        os.environ.get('DATABASE_URL', 'sqlite:///db.sqlite3'),
+        BASE_DIR,
+        sqlite_options=SQLITE_PRODUCTION_OPTIONS if SQLITE_PROFILE == 'production' else {},
+        pool=os.environ.get('DB_POOL', '1') == '1',
+        pool_min_size=int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+        pool_max_size=int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+        pool_timeout=float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+    )
 }
 
 
+# Cache shared by all workers (see easyShop/cache.py): a file cache in ./cache by
+# default, CACHE_URL=redis://... to use Redis. Sessions are cached there too and
+# only written through to the database (SESSION_CACHE=0 reads them from the table).
+CACHES = {
+    'default': cache_from_url(
+        os.environ.get('CACHE_URL', 'file://cache'),
+        BASE_DIR,
+        key_prefix='easyshop',
+        timeout=int(os.environ.get('CACHE_TIMEOUT', 300)),
+    )
+}
+SESSION_ENGINE = (
+    'django.contrib.sessions.backends.cached_db' if os.environ.get('SESSION_CACHE', '1') == '1'
+    else 'django.contrib.sessions.backends.db'
+)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -129,6 +181,11 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Generated PDFs (consolidated list), reused until the underlying lists change
+PDF_CACHE_DIR = BASE_DIR / 'pdf_cache'
+# Load PDF fonts in a background thread at startup instead of on the first PDF request
+PDF_FONT_WARMUP = os.environ.get('PDF_FONT_WARMUP') == '1'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
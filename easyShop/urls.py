@@ -33,6 +33,7 @@ urlpatterns = [
     path('family/list/<int:pk>/delete/', views.delete_market_list, name='delete_market_list'),
     path('management/login/', views.management_login, name='management_login'),
     path('management/dashboard/', views.management_dashboard, name='management_dashboard'),
+    path('management/history/<str:status>/', views.list_history, name='list_history'),
     path('management/user-directory/', views.user_directory, name='user_directory'),
     path('management/write-status/', views.write_list_status, name='write_list_status'),
     path('management/user-profiles/', views.user_profiles, name='user_profiles'),
@@ -53,6 +54,7 @@ urlpatterns = [
     path('management/revert-pending/<int:pk>/', views.revert_to_pending, name='revert_to_pending'),
     path('management/decline/<int:pk>/', views.decline_list, name='decline_list'),
     path('management/deliver/<int:pk>/', views.deliver_list, name='deliver_list'),
+    path('management/lists/bulk-status/', views.bulk_list_status, name='bulk_list_status'),
     path('management/restore/<int:pk>/', views.restore_list, name='restore_list'),
     path('management/delete/<int:pk>/', views.admin_delete_list, name='admin_delete_list'),
     path('management/list/<int:pk>/edit/', views.admin_edit_list, name='admin_edit_list'),
@@ -60,12 +62,17 @@ urlpatterns = [
     path('management/list-entry/user-view/', views.list_entry_user_view, name='list_entry_user_view'),
     path('management/list-entry/consolidated/', views.list_entry_consolidated, name='list_entry_consolidated'),
     path('management/list-entry/consolidated/pdf/', views.list_entry_consolidated_pdf, name='list_entry_consolidated_pdf'),
+    path('management/list-entry/all/pdf/', views.list_entry_all_pdf, name='list_entry_all_pdf'),
+    path('management/exports/<str:kind>/', views.export_enqueue, name='export_enqueue'),
+    path('management/exports/job/<int:job_id>/', views.export_job_status, name='export_job_status'),
+    path('management/exports/job/<int:job_id>/download/', views.export_job_download, name='export_job_download'),
     path('management/delivery-flow/save/', views.save_delivery_flow, name='save_delivery_flow'),
     path('management/send-status-presets/save/', views.save_send_status_presets, name='save_send_status_presets'),
     path('list/<int:pk>/comments/', views.list_comment_thread, name='list_comment_thread'),
     path('messages/', views.messaging_inbox, name='messaging_inbox'),
     path('messages/<int:user_id>/', views.messaging_thread, name='messaging_thread'),
     path('messages/unread-count/', views.message_unread_count, name='message_unread_count'),
+    path('events/', views.event_stream, name='event_stream'),
     path('logout/', views.user_logout, name='user_logout'),
 ]
 # Media files (profile pictures, pathway images, etc.)
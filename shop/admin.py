@@ -1,25 +1,67 @@
 from django.contrib import admin
-from .models import FamilyProfile, MarketList, MarketListItem, Notice, Conversation, Message, MarketListComment, Pathway, PathwayImage
+from .models import FamilyProfile, MarketList, MarketListItem, Notice, Conversation, Message, MarketListComment, Pathway, PathwayImage, ExportJob
+from .consolidated import consolidated_delta
+from .site_config import NOTICE, bump_config_version
 
 
 class MarketListItemInline(admin.TabularInline):
     model = MarketListItem
     extra = 0
+    # New rows are 'manual' and survive re-parsing; 'parsed' rows follow the list text
+    readonly_fields = ['source']
 
 
 @admin.register(MarketList)
 class MarketListAdmin(admin.ModelAdmin):
-    list_display = ['list_id', 'family', 'status', 'created_at']
-    list_filter = ['status', 'created_at']
+    list_display = ['list_id', 'family', 'status', 'delivery_flow', 'created_at']
+    list_filter = ['status', 'delivery_flow', 'created_at']
     inlines = [MarketListItemInline]
 
+    # Admin edits go through consolidated_delta like the views, so ConsolidatedItem
+    # and the cached list counts follow them. The list row and its inline items are
+    # saved in separate steps; each step applies its own delta.
+
+    def save_model(self, request, obj, form, change):
+        with consolidated_delta([obj.pk] if change else []):
+            super().save_model(request, obj, form, change)
+
+    def save_related(self, request, form, formsets, change):
+        with consolidated_delta([form.instance.pk]):
+            super().save_related(request, form, formsets, change)
+
+    def delete_model(self, request, obj):
+        with consolidated_delta([obj.pk]):
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with consolidated_delta(queryset.values_list('pk', flat=True)):
+            super().delete_queryset(request, queryset)
+
 
 @admin.register(FamilyProfile)
 class FamilyProfileAdmin(admin.ModelAdmin):
     list_display = ['full_name', 'user', 'phone', 'address']
 
 
-admin.site.register(MarketListItem)
+@admin.register(MarketListItem)
+class MarketListItemAdmin(admin.ModelAdmin):
+
+    def _list_ids(self, items):
+        return set(items.values_list('market_list_id', flat=True))
+
+    def save_model(self, request, obj, form, change):
+        # Both lists when the item moves to another one
+        list_ids = {obj.market_list_id} | (self._list_ids(MarketListItem.objects.filter(pk=obj.pk)) if change else set())
+        with consolidated_delta(list_ids):
+            super().save_model(request, obj, form, change)
+
+    def delete_model(self, request, obj):
+        with consolidated_delta([obj.market_list_id]):
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with consolidated_delta(self._list_ids(queryset)):
+            super().delete_queryset(request, queryset)
 
 
 @admin.register(Notice)
@@ -30,10 +72,22 @@ class NoticeAdmin(admin.ModelAdmin):
         return (obj.content or '')[:60] + '...' if len(obj.content or '') > 60 else (obj.content or '-')
     content_preview.short_description = 'Content'
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        bump_config_version(NOTICE)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_config_version(NOTICE)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        bump_config_version(NOTICE)
+
 
 @admin.register(Conversation)
 class ConversationAdmin(admin.ModelAdmin):
-    list_display = ['id', 'user', 'message_count']
+    list_display = ['id', 'user', 'message_count', 'last_message_at', 'unread_for_staff', 'unread_for_user']
 
     def message_count(self, obj):
         return obj.messages.count()
@@ -67,3 +121,9 @@ class PathwayImageInline(admin.TabularInline):
 class PathwayAdmin(admin.ModelAdmin):
     list_display = ['area_name', 'section_no', 'building_name', 'created_at']
     inlines = [PathwayImageInline]
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'requested_by', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status']
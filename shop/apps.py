@@ -1,6 +1,15 @@
+import threading
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ShopConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shop'
+
+    def ready(self):
+        if getattr(settings, 'PDF_FONT_WARMUP', False):
+            # Parse PDF fonts in the background so no request pays for it
+            from .pdf_utils import warm_pdf_fonts
+            threading.Thread(target=warm_pdf_fonts, name='pdf-font-warmup', daemon=True).start()
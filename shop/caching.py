@@ -0,0 +1,63 @@
+"""
+Namespaced keys and versioned invalidation on the shared cache (settings.CACHES).
+
+Values are stored under versioned_key(namespace, ...), which embeds the
+namespace's current version. bump_namespace() moves the version, so every value
+of the namespace is invalidated at once without knowing its keys; old entries
+are never read again and expire on their own. A missing version (cache cleared
+or evicted) restarts from a clock value, never from a number a worker may still
+hold.
+"""
+import time
+
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+
+# Market lists: status, items, delivery flow or existence changed
+LISTS = 'lists'
+
+
+def cache_key(namespace, *parts):
+    """'namespace:part:part' (settings KEY_PREFIX is added by the cache)."""
+    return ':'.join([namespace, *map(str, parts)])
+
+
+def namespace_version(namespace):
+    key = cache_key(namespace, 'version')
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(namespace):
+    # get + set rather than incr: incr on the file and locmem backends resets the
+    # key to the default timeout. Two racing bumps still both move the version.
+    key = cache_key(namespace, 'version')
+    cache.set(key, (cache.get(key) or time.time_ns()) + 1, timeout=None)
+
+
+def bump_namespace(namespace):
+    """
+    Invalidate every value in namespace. Bumps now and again after the current
+    transaction commits, so a value computed from pre-commit data in between is
+    dropped too.
+    """
+    _bump(namespace)
+    transaction.on_commit(lambda: _bump(namespace))
+
+
+def versioned_key(namespace, *parts):
+    return cache_key(namespace, f'v{namespace_version(namespace)}', *parts)
+
+
+def cached(namespace, parts, compute, timeout=DEFAULT_TIMEOUT):
+    """compute() cached under versioned_key(namespace, *parts)."""
+    key = versioned_key(namespace, *parts)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
@@ -0,0 +1,121 @@
+"""
+Materialized consolidated list.
+
+ConsolidatedItem holds, per (list status, delivery flow, item name, unit), the
+sum of every matching MarketListItem. Code that changes a list's items, status,
+delivery flow or existence wraps the change in consolidated_delta(): it reads the
+lists' contribution before and after (one grouped query each) and applies only
+the difference, so the consolidated pages read O(distinct items) rows instead of
+re-aggregating every line. rebuild_consolidated() recomputes the table from
+scratch for recovery (`manage.py rebuild_consolidated`).
+"""
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, Least
+
+from .caching import LISTS, bump_namespace
+from .models import ConsolidatedItem, MarketListItem
+
+_ZERO = Decimal(0)
+
+
+def list_contributions(items):
+    """
+    {(status, delivery_flow_pk, name_key, unit): [item_name, total, untallied, line_count, first_item_id]}
+    for a MarketListItem queryset, in one grouped query.
+    """
+    rows = (
+        items.values('market_list__status', 'name_key', 'unit')
+        .annotate(
+            flow=Coalesce('market_list__delivery_flow_id', Value(ConsolidatedItem.NO_FLOW)),
+            name=Min('item_name'),
+            total=Sum('amount'),
+            untallied=Count('pk', filter=Q(amount__isnull=True)),
+            lines=Count('pk'),
+            first=Min('pk'),
+        )
+        .order_by()
+    )
+    return {
+        (row['market_list__status'], row['flow'], row['name_key'], row['unit']):
+            [row['name'], row['total'] or _ZERO, row['untallied'], row['lines'], row['first']]
+        for row in rows
+    }
+
+
+def _apply(before, after):
+    deltas = {}
+    for key in before.keys() | after.keys():
+        current = after.get(key) or before[key]
+        # first_item_id only moves earlier; removals leave it for rebuild to tighten
+        name, first = current[0], (after[key][4] if key in after else None)
+        old = before.get(key, [name, _ZERO, 0, 0, first])
+        new = after.get(key, [name, _ZERO, 0, 0, first])
+        delta = (new[1] - old[1], new[2] - old[2], new[3] - old[3])
+        if any(delta):
+            deltas[key] = (name, first, delta)
+    if not deltas:
+        return 0
+    names = {key[2] for key in deltas}
+
+    def existing():
+        return {
+            (row.status, row.delivery_flow_pk, row.name_key, row.unit): row
+            for row in ConsolidatedItem.objects.filter(name_key__in=names).only(
+                'pk', 'status', 'delivery_flow_pk', 'name_key', 'unit')
+        }
+
+    rows = existing()
+    missing = [key for key in deltas if key not in rows]
+    if missing:
+        # Zero placeholders first, so concurrent writers both end up adding to one row
+        ConsolidatedItem.objects.bulk_create([
+            ConsolidatedItem(status=key[0], delivery_flow_pk=key[1], name_key=key[2], unit=key[3],
+                             item_name=deltas[key][0], first_item_id=deltas[key][1] or 0)
+            for key in missing
+        ], ignore_conflicts=True)
+        rows = existing()
+    changed = []
+    for key, (_, first, (d_total, d_untallied, d_lines)) in deltas.items():
+        row = rows[key]
+        row.total = F('total') + d_total
+        row.untallied = F('untallied') + d_untallied
+        row.line_count = F('line_count') + d_lines
+        row.first_item_id = F('first_item_id') if first is None else Least('first_item_id', Value(first))
+        changed.append(row)
+    ConsolidatedItem.objects.bulk_update(changed, ['total', 'untallied', 'line_count', 'first_item_id'])
+    ConsolidatedItem.objects.filter(name_key__in=names, line_count__lte=0).delete()
+    return len(changed)
+
+
+@contextmanager
+def consolidated_delta(list_ids):
+    """Apply the change the wrapped block makes to these lists (items, status, delivery flow, deletion)."""
+    items = MarketListItem.objects.filter(market_list_id__in=list(list_ids))
+    with transaction.atomic():
+        before = list_contributions(items)
+        yield
+        _apply(before, list_contributions(items))
+        bump_namespace(LISTS)
+
+
+def consolidated_rows(items):
+    """Unsaved ConsolidatedItem rows totalling the items queryset."""
+    return [
+        ConsolidatedItem(status=status, delivery_flow_pk=flow, name_key=name_key, unit=unit, item_name=name,
+                         total=total, untallied=untallied, line_count=lines, first_item_id=first)
+        for (status, flow, name_key, unit), (name, total, untallied, lines, first)
+        in list_contributions(items).items()
+    ]
+
+
+def rebuild_consolidated():
+    """Recompute every ConsolidatedItem row from MarketListItem; returns how many rows were written."""
+    rows = consolidated_rows(MarketListItem.objects.all())
+    with transaction.atomic():
+        ConsolidatedItem.objects.all().delete()
+        ConsolidatedItem.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -0,0 +1,159 @@
+"""
+Delivery flow engine: which admin-defined time window an order falls in.
+
+Flows are loaded once per worker into a sorted interval table and looked up with
+bisect, cached per worker until the delivery_flows config version moves
+(shop.site_config). Each MarketList stores the matching flow (a foreign key, so
+reordering or inserting flows never changes which flow a delivered list was
+handled in) when it is created; saving flows re-slots active lists in one UPDATE,
+so pages and admin filters read the stored flow instead of re-classifying.
+Matching is per minute, inclusive on both ends (same as the dashboard JS), and a
+flow whose end is before its start crosses midnight.
+"""
+from bisect import bisect_right
+from datetime import time as dtime
+
+from django.db.models import BigIntegerField, Case, Q, Value, When
+from django.utils import timezone
+
+from .models import DeliveryFlow, MarketList
+from .site_config import DELIVERY_FLOWS, cached_config, forget_config
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def _minute_of_day(t):
+    return t.hour * 60 + t.minute
+
+
+class DeliveryFlowTable:
+    """Non-overlapping [start, end) minute segments, each owned by the first flow (sort order) covering it."""
+
+    def __init__(self, flows):
+        self.flows = list(flows)
+        ranges = []  # (start_minute, end_minute_exclusive, flow_index)
+        for idx, f in enumerate(self.flows):
+            start = _minute_of_day(f.start_time)
+            end = _minute_of_day(f.end_time) + 1
+            if start < end:
+                ranges.append((start, end, idx))
+            else:
+                ranges.append((start, MINUTES_PER_DAY, idx))
+                ranges.append((0, end, idx))
+        bounds = sorted({b for r in ranges for b in r[:2]})
+        self._starts = []
+        self._owners = []
+        for lo, hi in zip(bounds, bounds[1:]):
+            owner = min((idx for start, end, idx in ranges if start <= lo and hi <= end), default=None)
+            if self._owners and self._owners[-1] == owner:
+                continue
+            self._starts.append(lo)
+            self._owners.append(owner)
+        if bounds:
+            self._starts.append(bounds[-1])
+            self._owners.append(None)
+        self._by_id = {f.pk: f for f in self.flows}
+
+    def segments(self):
+        """(start_minute, end_minute_exclusive, flow) for every owned segment."""
+        ends = self._starts[1:] + [MINUTES_PER_DAY]
+        return [
+            (lo, hi, self.flows[owner])
+            for lo, hi, owner in zip(self._starts, ends, self._owners)
+            if owner is not None
+        ]
+
+    def flow_for(self, dt):
+        """DeliveryFlow whose window contains the local time of dt, or None."""
+        if dt is None or not self._starts:
+            return None
+        if timezone.is_aware(dt):
+            dt = timezone.localtime(dt)
+        pos = bisect_right(self._starts, _minute_of_day(dt)) - 1
+        if pos < 0:
+            return None
+        owner = self._owners[pos]
+        return self.flows[owner] if owner is not None else None
+
+    def flow_by_id(self, flow_id):
+        return self._by_id.get(flow_id) if flow_id is not None else None
+
+    def status_for(self, dt):
+        """Send Order Status text for an order placed at dt (None if no flow matches)."""
+        flow = self.flow_for(dt)
+        if flow is None:
+            return None
+        return flow.status_text or 'Approved'
+
+    def classify(self, lists):
+        """[(list, flow_status)] for the family dashboard history, read from the stored flow."""
+        result = []
+        for lst in lists:
+            flow = self.flow_by_id(lst.delivery_flow_id)
+            result.append((lst, (flow.status_text or 'Approved') if flow is not None else None))
+        return result
+
+    def as_dicts(self):
+        """Flow config for the dashboard / funnel JS (json_script)."""
+        return [
+            {
+                'id': f.pk,
+                'name': f.name or f"Flow {idx}",
+                'label': f.label,
+                'start': f.start_time.strftime('%H:%M'),
+                'end': f.end_time.strftime('%H:%M'),
+                'statusText': f.status_text or 'Approved',
+            }
+            for idx, f in enumerate(self.flows, 1)
+        ]
+
+
+def get_flow_table():
+    """Per-worker cached DeliveryFlowTable, reloaded after flows are saved."""
+    return cached_config(
+        DELIVERY_FLOWS, lambda: DeliveryFlowTable(DeliveryFlow.objects.all().order_by('sort_order', 'id')))
+
+
+def current_flow_for(when):
+    """
+    DeliveryFlow covering when, for storing on a list. The cached table can name a
+    flow removed by another worker within VERSION_CHECK_INTERVAL; that table is
+    reloaded rather than pointing a new list at a deleted row.
+    """
+    flow = get_flow_table().flow_for(when)
+    if flow is not None and not DeliveryFlow.objects.filter(pk=flow.pk).exists():
+        invalidate_flow_table()
+        flow = get_flow_table().flow_for(when)
+    return flow
+
+
+def invalidate_flow_table():
+    """Drop this worker's cached table (other workers follow the config version)."""
+    forget_config(DELIVERY_FLOWS)
+
+
+def _minute_time(minute):
+    return dtime(minute // 60, minute % 60)
+
+
+def backfill_delivery_flows(table=None, queryset=None):
+    """
+    Point lists at the current flows with one UPDATE; returns rows updated.
+    Only active (pending/approved) lists by default: delivered/declined keep the flow
+    they were handled in.
+    """
+    if table is None:
+        table = get_flow_table()
+    if queryset is None:
+        queryset = MarketList.objects.filter(status__in=['pending', 'approved'])
+    whens = []
+    for lo, hi, flow in table.segments():
+        cond = Q(created_at__time__gte=_minute_time(lo))
+        if hi < MINUTES_PER_DAY:
+            cond &= Q(created_at__time__lt=_minute_time(hi))
+        whens.append(When(cond, then=Value(flow.pk)))
+    if not whens:
+        return queryset.update(delivery_flow=None)
+    return queryset.update(
+        delivery_flow=Case(*whens, default=Value(None), output_field=BigIntegerField())
+    )
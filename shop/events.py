@@ -0,0 +1,203 @@
+"""
+Live updates for open pages over Server-Sent Events.
+
+Writers call publish() inside the request that changes something; it stores a
+LiveEvent row, so events survive across worker processes and are only visible
+once the writing transaction commits. Each ASGI worker runs one EventHub task
+that polls LiveEvent for new rows and fans them out to the connected streams
+through in-memory queues: an idle family holding a stream open costs no queries,
+and a worker's database load does not grow with the number of open tabs.
+
+Channels are a user's pk (their own list and message events) and STAFF (every
+staff page: new family messages and all list transitions).
+"""
+import asyncio
+import json
+import logging
+import time
+import weakref
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import LiveEvent
+
+logger = logging.getLogger(__name__)
+
+STAFF = 'staff'
+
+# How often each worker checks LiveEvent for new rows
+POLL_INTERVAL = 1.0
+# Comment line sent on idle streams so proxies do not close them
+KEEPALIVE_INTERVAL = 25
+EVENT_RETENTION = timedelta(days=1)
+PRUNE_INTERVAL = 3600
+# Events buffered per stream; a stream that falls further behind is ended with a
+# resync event and the client reconnects for a fresh snapshot
+QUEUE_SIZE = 100
+# PostgreSQL assigns ids at INSERT, not at commit, so a slower transaction can make
+# a lower id visible after a higher one was delivered. Each poll re-reads rows this
+# recent and skips the ones already sent (on SQLite writers commit in id order).
+REORDER_WINDOW = timedelta(seconds=10)
+
+
+def publish(kind, payload, user_id=None, to_staff=False):
+    """Queue an event for user_id's streams and/or every staff stream."""
+    return LiveEvent.objects.create(kind=kind, payload=payload, recipient_id=user_id, to_staff=to_staff)
+
+
+def publish_list_status(market_list):
+    """list_status event for the list's family and staff (approve/deliver/decline/restore)."""
+    return publish('list_status', {
+        'pk': market_list.pk,
+        'list_id': market_list.list_id,
+        'status': market_list.status,
+    }, user_id=market_list.family_id, to_staff=True)
+
+
+def publish_list_statuses(lists):
+    """publish_list_status for many lists (dicts with pk, list_id, status, family_id) in one INSERT."""
+    return LiveEvent.objects.bulk_create([
+        LiveEvent(kind='list_status', payload={'pk': ml['pk'], 'list_id': ml['list_id'], 'status': ml['status']},
+                  recipient_id=ml['family_id'], to_staff=True)
+        for ml in lists
+    ])
+
+
+def format_event(row):
+    """SSE frame for a LiveEvent values() row (id lets the browser resume with Last-Event-ID)."""
+    data = json.dumps(row['payload'], ensure_ascii=False)
+    return f"id: {row['id']}\nevent: {row['kind']}\ndata: {data}\n\n"
+
+
+def events_for(channels, after_id):
+    """LiveEvent rows after after_id addressed to any of channels (reconnect replay)."""
+    condition = Q(recipient_id__in=[ch for ch in channels if ch != STAFF])
+    if STAFF in channels:
+        condition |= Q(to_staff=True)
+    return (
+        LiveEvent.objects.filter(condition, pk__gt=after_id).order_by('pk')
+        .values('id', 'kind', 'payload', 'recipient_id', 'to_staff')
+    )
+
+
+class StreamQueue(asyncio.Queue):
+    """A stream's queue; overflowed once the hub dropped it for falling QUEUE_SIZE events behind."""
+    overflowed = False
+
+
+class EventHub:
+    """Per-event-loop fan-out of new LiveEvent rows to subscribed queues."""
+
+    def __init__(self):
+        self._subscribers = {}  # channel -> set of asyncio.Queue
+        self._task = None
+        self._last_id = None
+        self._started = None
+        self._sent = {}  # id -> created_at of rows delivered within REORDER_WINDOW
+        self._last_prune = 0.0
+
+    def subscribe(self, channels):
+        queue = StreamQueue(maxsize=QUEUE_SIZE)
+        for channel in channels:
+            self._subscribers.setdefault(channel, set()).add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        for channel in list(self._subscribers):
+            self._subscribers[channel].discard(queue)
+            if not self._subscribers[channel]:
+                del self._subscribers[channel]
+
+    async def poll_once(self):
+        """Deliver rows newer than the last one seen; returns how many were read."""
+        if self._last_id is None:
+            self._started = timezone.now()
+            latest = await LiveEvent.objects.order_by('-pk').values_list('pk', flat=True).afirst()
+            self._last_id = latest or 0
+        since = max(timezone.now() - REORDER_WINDOW, self._started)
+        rows = [
+            row async for row in LiveEvent.objects.filter(Q(pk__gt=self._last_id) | Q(created_at__gte=since))
+            .order_by('pk').values('id', 'kind', 'payload', 'recipient_id', 'to_staff', 'created_at')
+            if row['id'] not in self._sent
+        ]
+        self._sent = {pk: at for pk, at in self._sent.items() if at >= since}
+        for row in rows:
+            self._sent[row['id']] = row['created_at']
+            self._last_id = max(self._last_id, row['id'])
+            targets = set(self._subscribers.get(row['recipient_id'], ()))
+            if row['to_staff']:
+                targets |= self._subscribers.get(STAFF, set())
+            for queue in targets:
+                try:
+                    queue.put_nowait(row)
+                except asyncio.QueueFull:
+                    # Delivering more would leave a gap; the stream tells its client to resync
+                    queue.overflowed = True
+                    self.unsubscribe(queue)
+        return len(rows)
+
+    async def _prune(self):
+        self._last_prune = time.monotonic()
+        await LiveEvent.objects.filter(created_at__lt=timezone.now() - EVENT_RETENTION).adelete()
+
+    async def _run(self):
+        while self._subscribers:
+            try:
+                await self.poll_once()
+                if time.monotonic() - self._last_prune > PRUNE_INTERVAL:
+                    await self._prune()
+            except Exception:
+                logger.exception('Live event poll failed')
+            await asyncio.sleep(POLL_INTERVAL)
+        # Nobody listening: the next subscriber starts from the newest row, not a backlog
+        self._last_id = None
+        self._sent = {}
+
+
+async def stream_events(channels, last_event_id=None, snapshot=None):
+    """
+    Async iterator of SSE frames for a StreamingHttpResponse. Subscribes before
+    replaying missed rows (Last-Event-ID) or sending the snapshot so nothing falls
+    in between; ends when the client disconnects and the task is cancelled, or
+    with a resync event once the stream fell QUEUE_SIZE events behind.
+    """
+    hub = get_hub()
+    queue = hub.subscribe(channels)
+    try:
+        yield f'retry: {POLL_INTERVAL * 5 * 1000:.0f}\n\n'
+        seen = 0
+        if last_event_id is not None:
+            async for row in events_for(channels, last_event_id):
+                seen = row['id']
+                yield format_event(row)
+        elif snapshot is not None:
+            yield f"event: unread\ndata: {json.dumps(snapshot)}\n\n"
+        while True:
+            if queue.overflowed:
+                yield 'event: resync\ndata: {}\n\n'
+                return
+            try:
+                row = await asyncio.wait_for(queue.get(), KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if row['id'] > seen:
+                yield format_event(row)
+    finally:
+        hub.unsubscribe(queue)
+
+
+_hubs = weakref.WeakKeyDictionary()
+
+
+def get_hub():
+    """The EventHub for the running event loop (one per ASGI worker)."""
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = EventHub()
+    return hub
@@ -0,0 +1,159 @@
+"""
+Background PDF exports.
+
+Views enqueue an ExportJob and return its id straight away; `manage.py
+run_export_worker` claims queued jobs (a conditional UPDATE, so two workers
+never take the same job) and renders them in a process pool, writing the PDF
+under PDF_CACHE_DIR/exports. Pages poll the job's status URL and download the
+file when it is done. Everything lives in the regular database, so a single box
+with SQLite needs nothing else.
+
+A rendering job records a heartbeat every HEARTBEAT_INTERVAL; one whose
+heartbeat is older than STALE_AFTER belongs to a worker that stopped and goes
+back to the queue, however long a live render takes.
+"""
+import os
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections
+from django.utils import timezone
+
+from .models import ExportJob
+from .queries import consolidated_lines, list_entry_lists
+
+# Finished jobs (and their files) are removed after this long
+EXPORT_RETENTION = timedelta(days=1)
+HEARTBEAT_INTERVAL = timedelta(seconds=30)
+# A running job without a heartbeat for this long is requeued (several missed beats)
+STALE_AFTER = timedelta(minutes=2)
+
+
+def _build_list_entry_all(params):
+    from .pdf_utils import list_entry_pdf_bytes
+    return list_entry_pdf_bytes(list_entry_lists(params.get('filter', 'total')))
+
+
+def _build_consolidated(params):
+    from .pdf_utils import consolidated_pdf_bytes
+    return consolidated_pdf_bytes(consolidated_lines(params.get('filter', 'total')), date.today())
+
+
+# kind -> (download file name, builder(params) -> PDF bytes or None)
+EXPORT_KINDS = {
+    'list_entry_all': ('list-entry-all.pdf', _build_list_entry_all),
+    'consolidated': ('consolidated-list.pdf', _build_consolidated),
+}
+
+
+def export_dir():
+    path = os.path.join(str(settings.PDF_CACHE_DIR), 'exports')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def enqueue_export(kind, params, user=None):
+    if kind not in EXPORT_KINDS:
+        raise ValueError(f'Unknown export kind: {kind}')
+    return ExportJob.objects.create(kind=kind, params=params, requested_by=user)
+
+
+def claim_jobs(limit):
+    """Mark up to limit queued jobs running and return their ids (oldest first)."""
+    claimed = []
+    candidates = ExportJob.objects.filter(status='queued').order_by('created_at', 'pk').values_list('pk', flat=True)
+    for pk in candidates[:limit]:
+        now = timezone.now()
+        if ExportJob.objects.filter(pk=pk, status='queued').update(status='running', started_at=now, heartbeat_at=now):
+            claimed.append(pk)
+    return claimed
+
+
+def beat(job):
+    """Record that this run of job is still rendering; False once the job is no longer its own."""
+    return bool(ExportJob.objects.filter(pk=job.pk, status='running', started_at=job.started_at)
+                .update(heartbeat_at=timezone.now()))
+
+
+@contextmanager
+def _heartbeat(job):
+    """beat(job) every HEARTBEAT_INTERVAL from a thread while the block renders."""
+    stop = threading.Event()
+
+    def run():
+        try:
+            while not stop.wait(HEARTBEAT_INTERVAL.total_seconds()):
+                try:
+                    beat(job)
+                except DatabaseError:
+                    pass  # The next beat retries; STALE_AFTER allows for a few misses
+        finally:
+            connections.close_all()  # this thread's connections only
+
+    thread = threading.Thread(target=run, name=f'export-heartbeat-{job.pk}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_export_job(job_id):
+    """Render one claimed job and record the outcome; returns the final status. Runs in pool processes."""
+    close_old_connections()
+    job = ExportJob.objects.get(pk=job_id)
+    filename, builder = EXPORT_KINDS[job.kind]
+    try:
+        with _heartbeat(job):
+            pdf_bytes = builder(job.params)
+        if pdf_bytes is None:
+            raise RuntimeError('PDF জেনারেট করতে fpdf2 বা reportlab ইনস্টল করুন')
+        name = f'job-{job.pk}-{filename}'
+        tmp = os.path.join(export_dir(), name + '.tmp')
+        with open(tmp, 'wb') as fh:
+            fh.write(pdf_bytes)
+        os.replace(tmp, os.path.join(export_dir(), name))
+        job.status, job.result_file, job.error = 'done', name, ''
+    except Exception:
+        job.status, job.error = 'failed', traceback.format_exc(limit=5)
+    job.finished_at = timezone.now()
+    # Only while this run still owns the job: a stale one may have been requeued and claimed again
+    ExportJob.objects.filter(pk=job.pk, status='running', started_at=job.started_at).update(
+        status=job.status, result_file=job.result_file, error=job.error, finished_at=job.finished_at)
+    close_old_connections()
+    return job.status
+
+
+def export_file_path(job):
+    """Absolute path of a finished job's PDF, or None if it is not there."""
+    if job.status != 'done' or not job.result_file:
+        return None
+    path = os.path.join(export_dir(), os.path.basename(job.result_file))
+    return path if os.path.isfile(path) else None
+
+
+def requeue_interrupted(now=None):
+    """
+    Running jobs whose heartbeat is older than STALE_AFTER go back to the queue;
+    returns how many. Jobs a live worker is still rendering keep beating and are
+    left alone.
+    """
+    cutoff = (now or timezone.now()) - STALE_AFTER
+    return ExportJob.objects.filter(status='running', heartbeat_at__lt=cutoff).update(
+        status='queued', started_at=None, heartbeat_at=None)
+
+
+def prune_finished(now=None):
+    """Delete finished jobs older than EXPORT_RETENTION along with their files."""
+    cutoff = (now or timezone.now()) - EXPORT_RETENTION
+    old = ExportJob.objects.filter(status__in=['done', 'failed'], finished_at__lt=cutoff)
+    for name in old.exclude(result_file='').values_list('result_file', flat=True):
+        try:
+            os.remove(os.path.join(export_dir(), os.path.basename(name)))
+        except OSError:
+            pass
+    return old.delete()[0]
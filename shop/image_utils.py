@@ -0,0 +1,43 @@
+"""
+Image helpers for uploads (profile avatars, pathway thumbnails). Uses Pillow.
+"""
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+
+
+def resize_to_jpeg(image_file, max_size, quality=85):
+    """Downscale to fit max_size x max_size and re-encode as JPEG. Returns ContentFile."""
+    from PIL import Image
+    img = Image.open(image_file)
+    img = img.convert('RGB')
+    w, h = img.size
+    if w > max_size or h > max_size:
+        r = min(max_size / w, max_size / h)
+        img = img.resize((int(w * r), int(h * r)), Image.Resampling.LANCZOS)
+    out = BytesIO()
+    img.save(out, format='JPEG', quality=quality)
+    return ContentFile(out.getvalue())
+
+
+def pathway_thumbnail(image_name, max_size=320):
+    """
+    Store a JPEG thumbnail for a saved PathwayImage's image.
+    Returns (thumbnail_name, width, height) of the original, or None if it can't be read.
+    """
+    from PIL import Image
+    from .models import PathwayImage
+    image_field = PathwayImage._meta.get_field('image')
+    thumb_field = PathwayImage._meta.get_field('thumbnail')
+    try:
+        with image_field.storage.open(image_name, 'rb') as f:
+            width, height = Image.open(f).size
+            f.seek(0)
+            thumb = resize_to_jpeg(f, max_size, quality=80)
+    except (OSError, Image.DecompressionBombError):
+        # Missing or unreadable file, not an image (UnidentifiedImageError is an OSError)
+        return None
+    base = os.path.splitext(os.path.basename(image_name))[0]
+    name = thumb_field.storage.save(thumb_field.generate_filename(None, f'thumb_{base}.jpg'), thumb)
+    return name, width, height
@@ -0,0 +1,198 @@
+"""
+Structured MarketListItem rows parsed from a list's text, and the consolidated
+buying list built from them.
+
+Each line of the organized list (ai_content, or content when there is none)
+becomes one item: the numbering prefix is dropped and the line is split into
+the item name and its quantity ("চাল ২ কেজি" -> "চাল" / "২ কেজি"). Alongside the
+text, each item stores a normalized name key and the quantity as a number in a
+canonical unit (grams are kept as kg, ml as litres), so consolidated_items() can
+add up the same item across lists (see consolidated.py).
+"""
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Min, Sum
+
+from .consolidated import consolidated_delta
+from .models import ConsolidatedItem, MarketList, MarketListItem
+from .text_utils import NUMBER_PREFIX_RE, TO_BENGALI_DIGITS, bengali_number, clean_lines, to_ascii_digits
+
+# Unit as written -> (canonical unit, amount of the canonical unit it stands for)
+UNIT_ALIASES = {
+    'কেজি': ('kg', Decimal(1)), 'কে.জি': ('kg', Decimal(1)), 'kg': ('kg', Decimal(1)),
+    'গ্রাম': ('kg', Decimal('0.001')), 'gm': ('kg', Decimal('0.001')), 'g': ('kg', Decimal('0.001')),
+    'লিটার': ('l', Decimal(1)), 'ltr': ('l', Decimal(1)), 'l': ('l', Decimal(1)),
+    'মিলি': ('l', Decimal('0.001')), 'ml': ('l', Decimal('0.001')),
+    'টি': ('pcs', Decimal(1)), 'টা': ('pcs', Decimal(1)), 'পিস': ('pcs', Decimal(1)),
+    'pcs': ('pcs', Decimal(1)), 'pc': ('pcs', Decimal(1)),
+    'হালি': ('hali', Decimal(1)), 'ডজন': ('dozen', Decimal(1)),
+    'প্যাকেট': ('packet', Decimal(1)), 'packet': ('packet', Decimal(1)),
+    'বোতল': ('bottle', Decimal(1)), 'কৌটা': ('can', Decimal(1)), 'আঁটি': ('bunch', Decimal(1)),
+}
+# Canonical unit -> label on the consolidated list (and the label below 1, as thousandths)
+UNIT_LABELS = {
+    'kg': ('কেজি', 'গ্রাম'), 'l': ('লিটার', 'মিলি'), 'pcs': ('টি', None), 'hali': ('হালি', None),
+    'dozen': ('ডজন', None), 'packet': ('প্যাকেট', None), 'bottle': ('বোতল', None),
+    'can': ('কৌটা', None), 'bunch': ('আঁটি', None), '': ('', None),
+}
+_UNIT_PATTERN = '|'.join(sorted(map(re.escape, UNIT_ALIASES), key=len, reverse=True))
+_QUANTITY = r'[\d০-৯]+(?:[.,/][\d০-৯]+)?\s*(?:' + _UNIT_PATTERN + r')?'
+# Quantity at the end ("চাল ২ কেজি", "ডাল - 1kg") or at the start ("২ কেজি চাল")
+_TRAILING_QTY_RE = re.compile(r'^(?P<name>.*?\D)[\s:=\-–,]*(?P<qty>' + _QUANTITY + r')\s*$', re.IGNORECASE)
+_LEADING_QTY_RE = re.compile(r'^(?P<qty>' + _QUANTITY + r')(?:\s+|\s*[:\-–,]\s*)(?P<name>\D.*)$', re.IGNORECASE)
+_QTY_PARTS_RE = re.compile(
+    r'^(?P<whole>\d+)(?:(?P<sep>[.,/])(?P<part>\d+))?\s*(?P<unit>' + _UNIT_PATTERN + r')?$', re.IGNORECASE
+)
+_AMOUNT_STEP = Decimal('0.001')
+_AMOUNT_LIMIT = Decimal(10) ** 9
+
+_NAME_MAX = MarketListItem._meta.get_field('item_name').max_length
+_QTY_MAX = MarketListItem._meta.get_field('quantity').max_length
+
+
+def split_item_line(line):
+    """(item_name, quantity) for one list line; quantity is '' when the line has none."""
+    line = NUMBER_PREFIX_RE.sub('', line.strip()).strip()
+    if not line:
+        return '', ''
+    match = _TRAILING_QTY_RE.match(line) or _LEADING_QTY_RE.match(line)
+    if match and match.group('name').strip(' :-–,'):
+        return match.group('name').strip(' :-–,'), match.group('qty').strip()
+    return line, ''
+
+
+def normalize_item_name(name):
+    """Grouping key for an item name: ASCII digits, casefolded, single spaces."""
+    return ' '.join(to_ascii_digits(name).casefold().split()).strip(' .,:-–')[:_NAME_MAX]
+
+
+def parse_quantity(quantity):
+    """
+    (amount, unit) for a quantity split off by split_item_line: amount is a Decimal
+    in the canonical unit ("৫০০ গ্রাম" -> 0.5, 'kg'); (None, '') when there is none.
+    """
+    match = _QTY_PARTS_RE.match(to_ascii_digits(quantity).strip())
+    if not match:
+        return None, ''
+    unit, factor = UNIT_ALIASES.get((match.group('unit') or '').lower(), ('', Decimal(1)))
+    try:
+        amount = Decimal(match.group('whole'))
+        if match.group('sep') == '/':
+            amount /= Decimal(match.group('part'))
+        elif match.group('sep'):
+            amount = Decimal(f"{match.group('whole')}.{match.group('part')}")
+    except (InvalidOperation, ZeroDivisionError):
+        return None, ''
+    amount = (amount * factor).quantize(_AMOUNT_STEP)
+    if not amount or amount >= _AMOUNT_LIMIT:
+        return None, ''
+    return amount, unit
+
+
+def parse_list_items(text):
+    """[(item_name, quantity)] for every non-empty line of text, in order."""
+    items = []
+    for line in clean_lines(text):
+        name, qty = split_item_line(line)
+        if name:
+            items.append((name[:_NAME_MAX], qty[:_QTY_MAX]))
+    return items
+
+
+def build_items(market_list_id, text):
+    """Unsaved parsed MarketListItem rows for text."""
+    items = []
+    for pos, (name, qty) in enumerate(parse_list_items(text)):
+        amount, unit = parse_quantity(qty)
+        items.append(MarketListItem(
+            market_list_id=market_list_id, position=pos, item_name=name, quantity=qty,
+            name_key=normalize_item_name(name), amount=amount, unit=unit, source='parsed',
+        ))
+    return items
+
+
+def sync_list_items(market_list):
+    """
+    Replace market_list's parsed items with those parsed from its current text (one
+    bulk insert). Items entered by hand are left as they are.
+    """
+    items = build_items(market_list.pk, market_list.ai_content or market_list.content)
+    with consolidated_delta([market_list.pk]):
+        MarketListItem.objects.filter(market_list=market_list, source='parsed').delete()
+        MarketListItem.objects.bulk_create(items)
+    return items
+
+
+def backfill_list_items(chunk_size=500, only_missing=False):
+    """
+    Re-parse stored lists into items, one delete (of parsed items only) and one bulk
+    insert per chunk of lists; only_missing skips lists that already have items.
+    Returns (lists, items).
+    """
+    lists = MarketList.objects.order_by('pk').only('pk', 'content', 'ai_content')
+    if only_missing:
+        lists = lists.filter(items__isnull=True)
+    list_count = item_count = 0
+    chunk = []
+    for market_list in lists.iterator(chunk_size=chunk_size):
+        chunk.append(market_list)
+        if len(chunk) >= chunk_size:
+            item_count += _replace_items(chunk)
+            list_count += len(chunk)
+            chunk = []
+    if chunk:
+        item_count += _replace_items(chunk)
+        list_count += len(chunk)
+    return list_count, item_count
+
+
+def _replace_items(lists):
+    items = [item for ml in lists for item in build_items(ml.pk, ml.ai_content or ml.content)]
+    with consolidated_delta([ml.pk for ml in lists]):
+        MarketListItem.objects.filter(market_list_id__in=[ml.pk for ml in lists], source='parsed').delete()
+        MarketListItem.objects.bulk_create(items, batch_size=1000)
+    return len(items)
+
+
+def _format_amount(amount, unit):
+    label, small_label = UNIT_LABELS.get(unit, (unit, None))
+    if small_label and amount < 1:
+        amount, label = amount * 1000, small_label
+    text = format(amount.normalize(), 'f').translate(TO_BENGALI_DIGITS)
+    return f'{text} {label}' if label else text
+
+
+def consolidated_items(statuses=None, flow_id=None):
+    """
+    One line per distinct item across lists with these statuses (all when None)
+    and, optionally, one delivery flow (pk), in order of first appearance:
+    "চাল — ৭ কেজি", with a total per unit ("চিনি — ২ কেজি + ১ প্যাকেট") and "×n"
+    for lines that gave no quantity. Reads the materialized ConsolidatedItem rows.
+    """
+    rows = ConsolidatedItem.objects.all()
+    if statuses is not None:
+        rows = rows.filter(status__in=statuses)
+    if flow_id is not None:
+        rows = rows.filter(delivery_flow_pk=flow_id)
+    rows = (
+        rows.values('name_key', 'unit')
+        .annotate(name=Min('item_name'), total=Sum('total'), untallied=Sum('untallied'), first=Min('first_item_id'))
+        .order_by('first')
+    )
+    grouped = {}
+    for row in rows:
+        name, parts = grouped.setdefault(row['name_key'], (row['name'], []))
+        if row['total']:
+            parts.append(_format_amount(row['total'], row['unit']))
+        if row['untallied']:
+            parts.append('×' + bengali_number(row['untallied']))
+    lines = []
+    for name, parts in grouped.values():
+        if parts == ['×১']:
+            lines.append(name)
+        elif len(parts) == 1 and parts[0].startswith('×'):
+            lines.append(f'{name} {parts[0]}')
+        else:
+            lines.append(f"{name} — {' + '.join(parts)}")
+    return lines
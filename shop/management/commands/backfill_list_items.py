@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from shop.list_items import backfill_list_items
+
+
+class Command(BaseCommand):
+    help = 'Parse every market list into MarketListItem rows (name and quantity per line)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Lists rewritten per transaction')
+        parser.add_argument('--only-missing', action='store_true', help='Skip lists that already have items')
+
+    def handle(self, *args, **options):
+        lists, items = backfill_list_items(options['chunk_size'], options['only_missing'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {items} item(s) for {lists} list(s).'))
@@ -0,0 +1,122 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from shop.models import Conversation, FamilyProfile, MarketList, Message
+
+
+class Command(BaseCommand):
+    help = 'Seed a throwaway test database and time the hot query paths with and without Meta.indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lists', type=int, default=100000, help='Number of market lists to seed')
+        parser.add_argument('--families', type=int, default=2000, help='Number of families to seed')
+        parser.add_argument('--repeat', type=int, default=30, help='Runs per workload (median is reported)')
+
+    def handle(self, *args, **options):
+        # Never touch the real database: everything runs in a fresh test database
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self._seed(options['families'], options['lists'])
+            models = [MarketList, Message, FamilyProfile]
+            self._drop_indexes(models)
+            before = self._run(options['repeat'])
+            self._add_indexes(models)
+            after = self._run(options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        self.stdout.write(f"{options['lists']} lists / {options['families']} families, median of {options['repeat']} runs")
+        self.stdout.write(f"{'workload':<28}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+        for name, t_before in before.items():
+            t_after = after[name]
+            speedup = t_before / t_after if t_after else float('inf')
+            self.stdout.write(f'{name:<28}{t_before:>14.3f}{t_after:>14.3f}{speedup:>9.1f}x')
+
+    def _seed(self, n_families, n_lists):
+        now = timezone.now()
+        users = User.objects.bulk_create(
+            [User(username=f'bench_{i}') for i in range(n_families)], batch_size=1000
+        )
+        FamilyProfile.objects.bulk_create([
+            FamilyProfile(user=u, full_name=u.username, phone=f'01{i:09d}', address='-', is_deleted=(i % 20 == 0))
+            for i, u in enumerate(users)
+        ], batch_size=1000)
+        convs = Conversation.objects.bulk_create([Conversation(user=u) for u in users], batch_size=1000)
+        staff = User.objects.create(username='bench_staff', is_staff=True)
+        rng = random.Random(42)
+        statuses = ['approved'] * 2 + ['pending'] + ['delivered'] * 6 + ['declined']
+        batch = []
+        for i in range(n_lists):
+            status = rng.choice(statuses)
+            at = now - timedelta(minutes=rng.randrange(0, 60 * 24 * 365))
+            batch.append(MarketList(
+                list_id=f'Pack-bench-{i}', family=users[i % n_families], status=status, content='চাল\nডাল',
+                delivered_at=at if status == 'delivered' else None,
+                declined_at=at if status == 'declined' else None,
+            ))
+            if len(batch) == 5000:
+                MarketList.objects.bulk_create(batch)
+                batch = []
+        MarketList.objects.bulk_create(batch)
+        Message.objects.bulk_create([
+            Message(conversation=c, sender=staff, body='-', read_at=None if j == 0 else now)
+            for c in convs for j in range(5)
+        ], batch_size=5000)
+        self._users = users
+        self._phones = [f'01{i:09d}' for i in range(n_families) if i % 20]
+
+    def _drop_indexes(self, models):
+        with connection.schema_editor() as editor:
+            for model in models:
+                for index in model._meta.indexes:
+                    editor.remove_index(model, index)
+
+    def _add_indexes(self, models):
+        with connection.schema_editor() as editor:
+            for model in models:
+                for index in model._meta.indexes:
+                    editor.add_index(model, index)
+
+    def _run(self, repeat):
+        rng = random.Random(7)
+        workloads = {
+            'family_dashboard': lambda: self._family_dashboard(rng.choice(self._users)),
+            'management_dashboard': self._management_dashboard,
+            'family_login phone lookup': lambda: FamilyProfile.objects.filter(
+                phone=rng.choice(self._phones), is_deleted=False
+            ).first(),
+            'unread message count': lambda: Message.objects.filter(
+                conversation__user=rng.choice(self._users), read_at__isnull=True
+            ).exclude(sender_id=0).count(),
+        }
+        results = {}
+        for name, fn in workloads.items():
+            fn()  # warm up
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fn()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = statistics.median(timings)
+        return results
+
+    def _family_dashboard(self, user):
+        list(MarketList.objects.filter(family=user, status__in=['pending', 'approved']).order_by('-created_at'))
+        list(MarketList.objects.filter(family=user, status='delivered').order_by('-delivered_at', '-created_at'))
+        list(MarketList.objects.filter(family=user, status='declined').order_by('-declined_at', '-created_at'))
+
+    def _management_dashboard(self):
+        MarketList.objects.aggregate(
+            total=Count('pk', filter=~Q(status__in=['delivered', 'declined'])),
+            delivered=Count('pk', filter=Q(status='delivered')),
+        )
+        list(MarketList.objects.exclude(status__in=['delivered', 'declined']).order_by('-created_at')[:200])
+        list(MarketList.objects.filter(status='delivered').order_by('-delivered_at', '-pk')[:25])
+        list(MarketList.objects.filter(status='declined').order_by('-declined_at', '-pk')[:25])
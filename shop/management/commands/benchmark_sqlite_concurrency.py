@@ -0,0 +1,110 @@
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from django.utils import timezone
+
+from shop.models import LiveEvent, MarketList
+
+
+def _use_database(path, options):
+    # Point this process's default connection at the benchmark file before it connects
+    connections.close_all()
+    settings_dict = connections['default'].settings_dict
+    settings_dict['NAME'] = path
+    settings_dict['OPTIONS'] = dict(options)
+
+
+def _worker(path, options, seconds, write_ratio, seed, results):
+    _use_database(path, options)
+    rng = random.Random(seed)
+    pks = list(MarketList.objects.values_list('pk', flat=True))
+    reads = writes = locked = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            if rng.random() < write_ratio:
+                # What a status view does: read the row, then update it and add its live event, in one transaction
+                with transaction.atomic():
+                    ml = MarketList.objects.get(pk=rng.choice(pks))
+                    MarketList.objects.filter(pk=ml.pk).update(note=f'bench {time.monotonic()}', approved_at=timezone.now())
+                    LiveEvent.objects.create(kind='list_status', payload={'pk': ml.pk}, to_staff=True)
+                writes += 1
+            else:
+                # Dashboard-style read: counts plus one page of lists
+                MarketList.objects.filter(status='approved').count()
+                list(MarketList.objects.filter(status='delivered').order_by('-delivered_at')[:25])
+                reads += 1
+        except OperationalError:
+            locked += 1
+    connections.close_all()
+    results.put((reads, writes, locked))
+
+
+class Command(BaseCommand):
+    help = 'Time concurrent reads/writes from several processes on a throwaway SQLite file, default vs production profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent processes (like gunicorn workers)')
+        parser.add_argument('--seconds', type=float, default=10.0, help='Duration of each run')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='Share of operations that write')
+        parser.add_argument('--lists', type=int, default=20000, help='Market lists to seed')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('This benchmark compares SQLite profiles; the default database is not SQLite.')
+        original = dict(connections['default'].settings_dict)
+        profiles = [('default', {}), ('production', settings.SQLITE_PRODUCTION_OPTIONS)]
+        rows = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, profile_options in profiles:
+                path = os.path.join(tmp, f'{name}.sqlite3')
+                _use_database(path, profile_options)
+                call_command('migrate', verbosity=0)
+                self._seed(options['lists'])
+                connections.close_all()
+                rows.append((name, *self._run(path, profile_options, options)))
+        _use_database(original['NAME'], original.get('OPTIONS', {}))
+
+        self.stdout.write(
+            f"{options['workers']} workers, {options['seconds']:.0f}s, {options['write_ratio']:.0%} writes, {options['lists']} lists"
+        )
+        self.stdout.write(f"{'profile':<12}{'reads/s':>12}{'writes/s':>12}{'locked errors':>16}")
+        for name, reads, writes, locked in rows:
+            self.stdout.write(
+                f"{name:<12}{reads / options['seconds']:>12.0f}{writes / options['seconds']:>12.0f}{locked:>16}"
+            )
+
+    def _seed(self, n_lists):
+        family = User.objects.create(username='bench_family')
+        statuses = ['approved', 'pending', 'delivered', 'delivered', 'declined']
+        now = timezone.now()
+        MarketList.objects.bulk_create([
+            MarketList(list_id=f'Pack-bench-{i}', family=family, status=statuses[i % 5], content='চাল\nডাল',
+                       delivered_at=now if i % 5 in (2, 3) else None)
+            for i in range(n_lists)
+        ], batch_size=2000)
+
+    def _run(self, path, profile_options, options):
+        ctx = multiprocessing.get_context('fork')
+        results = ctx.Queue()
+        procs = [
+            ctx.Process(target=_worker, args=(path, profile_options, options['seconds'], options['write_ratio'], i, results))
+            for i in range(options['workers'])
+        ]
+        for proc in procs:
+            proc.start()
+        totals = [0, 0, 0]
+        for _ in procs:
+            for idx, value in enumerate(results.get()):
+                totals[idx] += value
+        for proc in procs:
+            proc.join()
+        return totals
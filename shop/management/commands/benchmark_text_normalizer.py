@@ -0,0 +1,86 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.templatetags.shop_extras import first_three_preview, numbered_list
+from shop.text_utils import clean_lines, clean_lines_many
+
+
+def _legacy_first_three_preview(value):
+    # first_three_preview before text_utils: regex compiled (cache lookup) per line, whole text split
+    if not value:
+        return '-'
+    import re
+    lines = [s.strip() for s in str(value).splitlines() if s.strip()]
+    if not lines:
+        return '-'
+
+    def strip_number(txt):
+        return re.sub(r'^[\d০-৯०-९]+\s*[\.\)]\s*', '', txt, count=1).strip() or txt
+    items = [strip_number(line) for line in lines]
+    numbered = [f'{i}. {item}' for i, item in enumerate(items[:3], 1)]
+    if len(numbered) == 1:
+        return numbered[0]
+    if len(numbered) == 2:
+        return numbered[0] + ' • ' + numbered[1]
+    return numbered[0] + ' • ' + numbered[1] + '\n' + ' • '.join(numbered[2:])
+
+
+def _legacy_numbered_list(value):
+    if not value:
+        return ''
+    lines = [s.strip() for s in str(value).splitlines() if s.strip()]
+    return '\n'.join(f'{i}. {line}' for i, line in enumerate(lines, 1))
+
+
+def _legacy_clean_lines(texts):
+    return [[ln.strip() for ln in (t or '').strip().splitlines() if ln.strip()] for t in texts]
+
+
+class Command(BaseCommand):
+    help = 'Time the list text filters and line cleaning against their pre-text_utils implementations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=1000, help='List contents per run (one per card)')
+        parser.add_argument('--lines', type=int, default=15, help='Points per list')
+        parser.add_argument('--repeat', type=int, default=30, help='Runs per workload (median is reported)')
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        words = ['চাল', 'ডাল', 'তেল', 'আলু', 'পেঁয়াজ', 'ডিম', 'চিনি', 'লবণ', 'সাবান', 'মরিচ']
+        digits = '০১২৩৪৫৬৭৮৯'
+        contents = [
+            '\n'.join(
+                f'{digits[(j + 1) % 10]}. {rng.choice(words)} {rng.randint(1, 5)} কেজি  ' + ('\n' if j % 4 == 0 else '')
+                for j in range(options['lines'])
+            )
+            for _ in range(options['cards'])
+        ]
+        workloads = [
+            ('first_three_preview', lambda: [_legacy_first_three_preview(c) for c in contents],
+             lambda: [first_three_preview(c) for c in contents]),
+            ('numbered_list', lambda: [_legacy_numbered_list(c) for c in contents],
+             lambda: [numbered_list(c) for c in contents]),
+            ('clean lines (funnel)', lambda: _legacy_clean_lines(contents),
+             lambda: clean_lines_many(contents)),
+        ]
+        for name, legacy, current in workloads:
+            assert legacy() == current(), name
+        assert clean_lines_many(contents) == [clean_lines(c) for c in contents]
+        n = options['cards']
+        self.stdout.write(f"{n} cards x {options['lines']} points, median of {options['repeat']} runs")
+        self.stdout.write(f"{'workload':<24}{'before (us/card)':>18}{'after (us/card)':>18}{'speedup':>10}")
+        for name, legacy, current in workloads:
+            before = self._time(legacy, options['repeat']) / n * 1e6
+            after = self._time(current, options['repeat']) / n * 1e6
+            self.stdout.write(f'{name:<24}{before:>18.2f}{after:>18.2f}{before / after:>9.1f}x')
+
+    def _time(self, fn, repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples)
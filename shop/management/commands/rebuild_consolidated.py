@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from shop.consolidated import rebuild_consolidated
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized consolidated list (ConsolidatedItem) from every MarketListItem'
+
+    def handle(self, *args, **options):
+        rows = rebuild_consolidated()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} consolidated item row(s).'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from shop.models import Conversation
+
+
+class Command(BaseCommand):
+    help = 'Recompute last message and unread counters on every Conversation from the Message table'
+
+    def handle(self, *args, **options):
+        updated = Conversation.rebuild_activity()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt activity counters for {updated} conversation(s).'))
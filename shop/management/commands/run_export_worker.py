@@ -0,0 +1,87 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from shop.models import ExportJob
+from shop.exports import claim_jobs, prune_finished, requeue_interrupted, run_export_job
+
+
+PRUNE_INTERVAL = 3600
+# Seconds between checks for running jobs whose heartbeat expired (exports.STALE_AFTER)
+REQUEUE_INTERVAL = 60
+
+
+def _init_worker():
+    # Forked children must not reuse the parent's database connections
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Render queued PDF export jobs in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help='Pool size (0 renders in this process)')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between queue checks')
+        parser.add_argument('--once', action='store_true', help='Drain the queue, then exit')
+
+    _last_prune = float('-inf')
+    _last_requeue = float('-inf')
+
+    def handle(self, *args, **options):
+        self._requeue()
+        if options['processes'] <= 0:
+            self._run_inline(options)
+            return
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options['processes'], initializer=_init_worker) as pool:
+            running = {}
+            while True:
+                for pk in claim_jobs(options['processes'] - len(running)):
+                    running[pool.submit(run_export_job, pk)] = pk
+                if not running:
+                    if options['once']:
+                        break
+                    self._idle(options)
+                    continue
+                done, _ = wait(running, timeout=options['interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    pk = running.pop(future)
+                    try:
+                        status = future.result()
+                    except Exception as exc:  # pool process died or the job row vanished
+                        ExportJob.objects.filter(pk=pk).update(status='failed', error=repr(exc), finished_at=timezone.now())
+                        status = 'failed'
+                    self._report(pk, status)
+
+    def _run_inline(self, options):
+        while True:
+            claimed = claim_jobs(1)
+            for pk in claimed:
+                self._report(pk, run_export_job(pk))
+            if not claimed:
+                if options['once']:
+                    break
+                self._idle(options)
+
+    def _idle(self, options):
+        if time.monotonic() - self._last_prune > PRUNE_INTERVAL:
+            prune_finished()
+            self._last_prune = time.monotonic()
+        if time.monotonic() - self._last_requeue > REQUEUE_INTERVAL:
+            self._requeue()
+        time.sleep(options['interval'])
+
+    def _requeue(self):
+        requeued = requeue_interrupted()
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} interrupted job(s).')
+        self._last_requeue = time.monotonic()
+
+    def _report(self, pk, status):
+        style = self.style.SUCCESS if status == 'done' else self.style.ERROR
+        self.stdout.write(style(f'Export job #{pk}: {status}'))
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-18 02:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0019_deliveryflow_status_text_again'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='familyprofile',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['phone'], name='profile_live_phone_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='marketlist',
+            index=models.Index(fields=['family', 'status', '-created_at'], name='marketlist_family_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='marketlist',
+            index=models.Index(fields=['family', 'status', '-delivered_at'], name='marketlist_family_dlv_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='marketlist',
+            index=models.Index(fields=['family', 'status', '-declined_at'], name='marketlist_family_dcl_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='marketlist',
+            index=models.Index(fields=['status', '-delivered_at'], name='marketlist_delivered_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='marketlist',
+            index=models.Index(fields=['status', '-declined_at'], name='marketlist_declined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(('read_at__isnull', True)), fields=['conversation', 'sender'], name='message_unread_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.0.2 on 2026-10-18 02:43
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def slot_existing_lists(apps, schema_editor):
+    # Frozen copy of the slotting at this point in history: each minute of the day
+    # belongs to the first flow (sort order) whose inclusive window covers it
+    MarketList = apps.get_model('shop', 'MarketList')
+    DeliveryFlow = apps.get_model('shop', 'DeliveryFlow')
+    owner = [None] * MINUTES_PER_DAY
+    for flow in DeliveryFlow.objects.order_by('sort_order', 'id'):
+        minute = flow.start_time.hour * 60 + flow.start_time.minute
+        end = flow.end_time.hour * 60 + flow.end_time.minute
+        while True:
+            if owner[minute] is None:
+                owner[minute] = flow.sort_order
+            if minute == end:
+                break
+            minute = (minute + 1) % MINUTES_PER_DAY
+    # Historic lists too, so counts by slot cover existing data
+    lists = []
+    for ml in MarketList.objects.only('pk', 'created_at'):
+        created = timezone.localtime(ml.created_at) if timezone.is_aware(ml.created_at) else ml.created_at
+        ml.delivery_flow_slot = owner[created.hour * 60 + created.minute]
+        if ml.delivery_flow_slot is not None:
+            lists.append(ml)
+    MarketList.objects.bulk_update(lists, ['delivery_flow_slot'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0020_add_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='marketlist',
+            name='delivery_flow_slot',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(slot_existing_lists, migrations.RunPython.noop),
+    ]
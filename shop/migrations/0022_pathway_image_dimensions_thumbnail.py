@@ -0,0 +1,58 @@
+# Generated by Django 6.0.2 on 2026-10-18 02:45
+
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import migrations, models
+
+
+def thumbnail_existing_images(apps, schema_editor):
+    # Frozen copy of shop.image_utils.pathway_thumbnail() at this point in history
+    from PIL import Image
+    PathwayImage = apps.get_model('shop', 'PathwayImage')
+    image_storage = PathwayImage._meta.get_field('image').storage
+    thumb_field = PathwayImage._meta.get_field('thumbnail')
+    for pk, name in PathwayImage.objects.exclude(image='').values_list('pk', 'image'):
+        try:
+            with image_storage.open(name, 'rb') as f:
+                img = Image.open(f)
+                width, height = img.size
+                img = img.convert('RGB')
+                if width > 320 or height > 320:
+                    r = min(320 / width, 320 / height)
+                    img = img.resize((int(width * r), int(height * r)), Image.Resampling.LANCZOS)
+                out = BytesIO()
+                img.save(out, format='JPEG', quality=80)
+        except (OSError, Image.DecompressionBombError):
+            continue
+        base = os.path.splitext(os.path.basename(name))[0]
+        thumb = thumb_field.storage.save(
+            thumb_field.generate_filename(None, f'thumb_{base}.jpg'), ContentFile(out.getvalue()))
+        PathwayImage.objects.filter(pk=pk).update(thumbnail=thumb, width=width, height=height)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0021_marketlist_delivery_flow_slot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pathwayimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='pathwayimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, upload_to='pathway_images/thumbs/%Y/%m/'),
+        ),
+        migrations.AddField(
+            model_name='pathwayimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(thumbnail_existing_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 6.0.2 on 2026-10-18 02:47
+
+from django.db import migrations, models
+from django.db.models import Case, Count, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Substr
+
+
+def fill_activity_counters(apps, schema_editor):
+    # Frozen copy of shop.models.conversation_activity_expressions() at this point in history
+    Conversation = apps.get_model('shop', 'Conversation')
+    Message = apps.get_model('shop', 'Message')
+    messages = Message.objects.filter(conversation=OuterRef('pk'))
+    last = messages.order_by('-created_at', '-pk')
+    preview = Case(
+        When(~Q(body=''), then=Substr('body', 1, 100)),
+        When(Q(image__isnull=False) & ~Q(image=''), then=Value('📷 ছবি')),
+        When(Q(file__isnull=False) & ~Q(file=''), then=Value('📎 ফাইল')),
+        default=Value(''),
+        output_field=models.CharField(),
+    )
+
+    def unread(sender_filter):
+        counted = messages.filter(sender_filter, read_at__isnull=True).values('conversation')
+        return Coalesce(Subquery(counted.annotate(n=Count('pk')).values('n')[:1]), 0)
+
+    Conversation.objects.update(
+        last_message_at=Subquery(last.values('created_at')[:1]),
+        last_message_preview=Coalesce(Subquery(last.annotate(preview=preview).values('preview')[:1]), Value('')),
+        unread_for_user=unread(~Q(sender=OuterRef('user'))),
+        unread_for_staff=unread(Q(sender=OuterRef('user'))),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0022_pathway_image_dimensions_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_preview',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='unread_for_staff',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='unread_for_user',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_activity_counters, migrations.RunPython.noop),
+    ]
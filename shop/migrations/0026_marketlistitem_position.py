@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-18 03:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0025_exportjob'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='marketlistitem',
+            options={'ordering': ['market_list', 'position']},
+        ),
+        migrations.AddField(
+            model_name='marketlistitem',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='marketlistitem',
+            index=models.Index(fields=['item_name'], name='marketlistitem_name_idx'),
+        ),
+    ]
@@ -0,0 +1,121 @@
+# Generated by Django 6.0.2 on 2026-10-18 03:13
+
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+
+# Frozen copy of shop.list_items.build_items() and its parser at this point in history
+UNIT_ALIASES = {
+    'কেজি': ('kg', Decimal(1)), 'কে.জি': ('kg', Decimal(1)), 'kg': ('kg', Decimal(1)),
+    'গ্রাম': ('kg', Decimal('0.001')), 'gm': ('kg', Decimal('0.001')), 'g': ('kg', Decimal('0.001')),
+    'লিটার': ('l', Decimal(1)), 'ltr': ('l', Decimal(1)), 'l': ('l', Decimal(1)),
+    'মিলি': ('l', Decimal('0.001')), 'ml': ('l', Decimal('0.001')),
+    'টি': ('pcs', Decimal(1)), 'টা': ('pcs', Decimal(1)), 'পিস': ('pcs', Decimal(1)),
+    'pcs': ('pcs', Decimal(1)), 'pc': ('pcs', Decimal(1)),
+    'হালি': ('hali', Decimal(1)), 'ডজন': ('dozen', Decimal(1)),
+    'প্যাকেট': ('packet', Decimal(1)), 'packet': ('packet', Decimal(1)),
+    'বোতল': ('bottle', Decimal(1)), 'কৌটা': ('can', Decimal(1)), 'আঁটি': ('bunch', Decimal(1)),
+}
+TO_ASCII_DIGITS = str.maketrans('০১২৩৪৫৬৭৮৯', '0123456789')
+NUMBER_PREFIX_RE = re.compile(r'^\d+\s*[.)](?!\d)[ \t]*')
+_UNIT_PATTERN = '|'.join(sorted(map(re.escape, UNIT_ALIASES), key=len, reverse=True))
+_QUANTITY = r'[\d০-৯]+(?:[.,/][\d০-৯]+)?\s*(?:' + _UNIT_PATTERN + r')?'
+_TRAILING_QTY_RE = re.compile(r'^(?P<name>.*?\D)[\s:=\-–,]*(?P<qty>' + _QUANTITY + r')\s*$', re.IGNORECASE)
+_LEADING_QTY_RE = re.compile(r'^(?P<qty>' + _QUANTITY + r')(?:\s+|\s*[:\-–,]\s*)(?P<name>\D.*)$', re.IGNORECASE)
+_QTY_PARTS_RE = re.compile(
+    r'^(?P<whole>\d+)(?:(?P<sep>[.,/])(?P<part>\d+))?\s*(?P<unit>' + _UNIT_PATTERN + r')?$', re.IGNORECASE
+)
+_NAME_MAX = 200
+_QTY_MAX = 100
+
+
+def split_item_line(line):
+    line = NUMBER_PREFIX_RE.sub('', line.strip()).strip()
+    if not line:
+        return '', ''
+    match = _TRAILING_QTY_RE.match(line) or _LEADING_QTY_RE.match(line)
+    if match and match.group('name').strip(' :-–,'):
+        return match.group('name').strip(' :-–,'), match.group('qty').strip()
+    return line, ''
+
+
+def parse_quantity(quantity):
+    match = _QTY_PARTS_RE.match(quantity.translate(TO_ASCII_DIGITS).strip())
+    if not match:
+        return None, ''
+    unit, factor = UNIT_ALIASES.get((match.group('unit') or '').lower(), ('', Decimal(1)))
+    try:
+        amount = Decimal(match.group('whole'))
+        if match.group('sep') == '/':
+            amount /= Decimal(match.group('part'))
+        elif match.group('sep'):
+            amount = Decimal(f"{match.group('whole')}.{match.group('part')}")
+    except (InvalidOperation, ZeroDivisionError):
+        return None, ''
+    amount = (amount * factor).quantize(Decimal('0.001'))
+    if not amount or amount >= Decimal(10) ** 9:
+        return None, ''
+    return amount, unit
+
+
+def build_items(item_model, market_list_id, text):
+    items = []
+    lines = [line for line in map(str.strip, str(text or '').splitlines()) if line]
+    for line in lines:
+        name, qty = split_item_line(line)
+        if not name:
+            continue
+        name, qty = name[:_NAME_MAX], qty[:_QTY_MAX]
+        amount, unit = parse_quantity(qty)
+        name_key = ' '.join(name.translate(TO_ASCII_DIGITS).casefold().split()).strip(' .,:-–')[:_NAME_MAX]
+        items.append(item_model(
+            market_list_id=market_list_id, position=len(items), item_name=name, quantity=qty,
+            name_key=name_key, amount=amount, unit=unit,
+        ))
+    return items
+
+
+def parse_existing_lists(apps, schema_editor):
+    MarketList = apps.get_model('shop', 'MarketList')
+    MarketListItem = apps.get_model('shop', 'MarketListItem')
+    # Lists that already have items (entered through the admin) keep them
+    items = []
+    lists = MarketList.objects.filter(items__isnull=True).only('pk', 'content', 'ai_content')
+    for ml in lists.iterator(chunk_size=500):
+        items.extend(build_items(MarketListItem, ml.pk, ml.ai_content or ml.content))
+        if len(items) >= 5000:
+            MarketListItem.objects.bulk_create(items)
+            items = []
+    MarketListItem.objects.bulk_create(items)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0026_marketlistitem_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='marketlistitem',
+            name='amount',
+            field=models.DecimalField(blank=True, decimal_places=3, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='marketlistitem',
+            name='name_key',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='marketlistitem',
+            name='unit',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='marketlistitem',
+            index=models.Index(fields=['name_key', 'unit'], name='marketlistitem_key_unit_idx'),
+        ),
+        migrations.RunPython(parse_existing_lists, migrations.RunPython.noop),
+    ]
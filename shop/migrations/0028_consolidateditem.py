@@ -0,0 +1,58 @@
+# Generated by Django 6.0.2 on 2026-10-18 03:16
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_consolidated(apps, schema_editor):
+    # Frozen copy of shop.consolidated.rebuild_consolidated() at this point in history
+    MarketListItem = apps.get_model('shop', 'MarketListItem')
+    ConsolidatedItem = apps.get_model('shop', 'ConsolidatedItem')
+    rows = (
+        MarketListItem.objects.values('market_list__status', 'name_key', 'unit')
+        .annotate(
+            slot=Coalesce('market_list__delivery_flow_slot', Value(-1)),
+            name=Min('item_name'),
+            total=Sum('amount'),
+            untallied=Count('pk', filter=Q(amount__isnull=True)),
+            lines=Count('pk'),
+            first=Min('pk'),
+        )
+        .order_by()
+    )
+    ConsolidatedItem.objects.bulk_create([
+        ConsolidatedItem(status=row['market_list__status'], flow_slot=row['slot'], name_key=row['name_key'],
+                         unit=row['unit'], item_name=row['name'], total=row['total'] or 0,
+                         untallied=row['untallied'], line_count=row['lines'], first_item_id=row['first'])
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0027_marketlistitem_normalized'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsolidatedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20)),
+                ('flow_slot', models.IntegerField(default=-1)),
+                ('name_key', models.CharField(max_length=200)),
+                ('unit', models.CharField(blank=True, max_length=10)),
+                ('item_name', models.CharField(max_length=200)),
+                ('total', models.DecimalField(decimal_places=3, default=0, max_digits=15)),
+                ('untallied', models.IntegerField(default=0)),
+                ('line_count', models.IntegerField(default=0)),
+                ('first_item_id', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('status', 'flow_slot', 'name_key', 'unit'), name='consolidateditem_key_unique')],
+            },
+        ),
+        migrations.RunPython(fill_consolidated, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 6.0.2 on 2026-10-18 03:19
+
+import re
+
+from django.db import migrations, models
+
+
+# Frozen copies of shop.templatetags.shop_extras first_three_preview / numbered_list at this point in history
+NUMBER_PREFIX_RE = re.compile(r'^\d+\s*[.)](?!\d)[ \t]*')
+
+
+def _numbered(lines):
+    return [f'{i}. {line}' for i, line in enumerate(lines, 1)]
+
+
+def first_three_preview(value):
+    lines = [line.strip() for line in str(value or '').split('\n') if line.strip()][:3]
+    numbered = _numbered([NUMBER_PREFIX_RE.sub('', line, count=1).strip() or line for line in lines])
+    if not numbered:
+        return '-'
+    if len(numbered) <= 2:
+        return ' • '.join(numbered)
+    return numbered[0] + ' • ' + numbered[1] + '\n' + numbered[2]
+
+
+def numbered_list(value):
+    return '\n'.join(_numbered(line.strip() for line in str(value or '').splitlines() if line.strip()))
+
+
+def render_existing_content(apps, schema_editor):
+    MarketList = apps.get_model('shop', 'MarketList')
+    batch = []
+    for ml in MarketList.objects.only('pk', 'content').iterator(chunk_size=500):
+        ml.content_preview = first_three_preview(ml.content)
+        ml.content_numbered = numbered_list(ml.content)
+        batch.append(ml)
+        if len(batch) == 500:
+            MarketList.objects.bulk_update(batch, ['content_preview', 'content_numbered'])
+            batch = []
+    MarketList.objects.bulk_update(batch, ['content_preview', 'content_numbered'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0028_consolidateditem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='marketlist',
+            name='content_numbered',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='marketlist',
+            name='content_preview',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(render_existing_content, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 6.0.2 on 2026-10-18 03:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+NO_FLOW = -1
+
+
+def slots_to_flows(apps, schema_editor):
+    # delivery_flow_slot held the flow's sort_order; point each list at the flow holding it now
+    MarketList = apps.get_model('shop', 'MarketList')
+    DeliveryFlow = apps.get_model('shop', 'DeliveryFlow')
+    seen = set()
+    for flow in DeliveryFlow.objects.order_by('sort_order', 'id'):
+        if flow.sort_order not in seen:
+            seen.add(flow.sort_order)
+            MarketList.objects.filter(delivery_flow_slot=flow.sort_order).update(delivery_flow=flow)
+
+
+def flows_to_slots(apps, schema_editor):
+    MarketList = apps.get_model('shop', 'MarketList')
+    DeliveryFlow = apps.get_model('shop', 'DeliveryFlow')
+    for flow in DeliveryFlow.objects.all():
+        MarketList.objects.filter(delivery_flow=flow).update(delivery_flow_slot=flow.sort_order)
+
+
+def rebuild_consolidated(apps, schema_editor):
+    # Frozen copy of shop.consolidated.rebuild_consolidated() at this point in history
+    MarketListItem = apps.get_model('shop', 'MarketListItem')
+    ConsolidatedItem = apps.get_model('shop', 'ConsolidatedItem')
+    rows = (
+        MarketListItem.objects.values('market_list__status', 'name_key', 'unit')
+        .annotate(
+            flow=Coalesce('market_list__delivery_flow_id', Value(NO_FLOW)),
+            name=Min('item_name'),
+            total=Sum('amount'),
+            untallied=Count('pk', filter=Q(amount__isnull=True)),
+            lines=Count('pk'),
+            first=Min('pk'),
+        )
+        .order_by()
+    )
+    ConsolidatedItem.objects.all().delete()
+    ConsolidatedItem.objects.bulk_create([
+        ConsolidatedItem(status=row['market_list__status'], delivery_flow_pk=row['flow'], name_key=row['name_key'],
+                         unit=row['unit'], item_name=row['name'], total=row['total'] or 0,
+                         untallied=row['untallied'], line_count=row['lines'], first_item_id=row['first'])
+        for row in rows
+    ], batch_size=1000)
+
+
+def clear_consolidated(apps, schema_editor):
+    # Rows keyed by flow pk do not map back to slots; run `manage.py rebuild_consolidated` after unapplying
+    apps.get_model('shop', 'ConsolidatedItem').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0030_configversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='marketlist',
+            name='delivery_flow',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='market_lists', to='shop.deliveryflow'),
+        ),
+        migrations.RunPython(slots_to_flows, flows_to_slots),
+        migrations.RemoveField(
+            model_name='marketlist',
+            name='delivery_flow_slot',
+        ),
+        migrations.RemoveConstraint(
+            model_name='consolidateditem',
+            name='consolidateditem_key_unique',
+        ),
+        migrations.RemoveField(
+            model_name='consolidateditem',
+            name='flow_slot',
+        ),
+        migrations.AddField(
+            model_name='consolidateditem',
+            name='delivery_flow_pk',
+            field=models.BigIntegerField(default=-1),
+        ),
+        migrations.RunPython(rebuild_consolidated, clear_consolidated),
+        migrations.AddConstraint(
+            model_name='consolidateditem',
+            constraint=models.UniqueConstraint(fields=('status', 'delivery_flow_pk', 'name_key', 'unit'), name='consolidateditem_key_unique'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:00
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def beat_running_jobs(apps, schema_editor):
+    # Jobs running at upgrade time count from their start, so a dead one is still requeued
+    ExportJob = apps.get_model('shop', 'ExportJob')
+    ExportJob.objects.filter(status='running').update(heartbeat_at=F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0031_marketlist_delivery_flow'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(beat_running_jobs, migrations.RunPython.noop),
+    ]
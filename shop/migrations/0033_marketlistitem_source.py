@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:03
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# The frozen parser that 0027 used to fill the items
+build_items = import_module('shop.migrations.0027_marketlistitem_normalized').build_items
+
+_FIELDS = ('position', 'item_name', 'quantity', 'name_key', 'amount', 'unit')
+
+
+def mark_parsed_items(apps, schema_editor):
+    # A list's items count as parsed only when they are exactly what its text parses
+    # to; any other list was edited by hand and its items stay 'manual'.
+    MarketList = apps.get_model('shop', 'MarketList')
+    MarketListItem = apps.get_model('shop', 'MarketListItem')
+    parsed_ids = []
+    lists = MarketList.objects.filter(items__isnull=False).distinct().only('pk', 'content', 'ai_content')
+    for ml in lists.iterator(chunk_size=500):
+        rows = list(MarketListItem.objects.filter(market_list_id=ml.pk).order_by('position', 'pk'))
+        expected = build_items(MarketListItem, ml.pk, ml.ai_content or ml.content)
+        if [tuple(getattr(i, f) for f in _FIELDS) for i in rows] == \
+                [tuple(getattr(i, f) for f in _FIELDS) for i in expected]:
+            parsed_ids.extend(i.pk for i in rows)
+    for start in range(0, len(parsed_ids), 500):
+        MarketListItem.objects.filter(pk__in=parsed_ids[start:start + 500]).update(source='parsed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0032_exportjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='marketlistitem',
+            name='source',
+            field=models.CharField(choices=[('parsed', 'Parsed from the list text'), ('manual', 'Entered by hand')], default='manual', editable=False, max_length=10),
+        ),
+        migrations.RunPython(mark_parsed_items, migrations.RunPython.noop),
+    ]
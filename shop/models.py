@@ -1,4 +1,7 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Substr
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 
@@ -24,6 +27,12 @@ class FamilyProfile(models.Model):
     is_deleted = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # family_login / registration phone lookup only ever targets live profiles
+            models.Index(fields=['phone'], name='profile_live_phone_idx', condition=models.Q(is_deleted=False)),
+        ]
+
     def __str__(self):
         return self.full_name or self.user.username
 
@@ -66,17 +75,48 @@ class MarketList(models.Model):
     approved_at = models.DateTimeField(null=True, blank=True)
     delivered_at = models.DateTimeField(null=True, blank=True)
     declined_at = models.DateTimeField(null=True, blank=True)
+    # Delivery flow whose window created_at falls in (set on create; active lists are re-pointed when flows are saved)
+    delivery_flow = models.ForeignKey(
+        'DeliveryFlow', on_delete=models.SET_NULL, null=True, blank=True, related_name='market_lists')
+    # Card renderings of content (first_three_preview / numbered_list), refreshed whenever content is saved
+    content_preview = models.TextField(blank=True, editable=False)
+    content_numbered = models.TextField(blank=True, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # family_dashboard: own active lists and own delivered/declined folders
+            models.Index(fields=['family', 'status', '-created_at'], name='marketlist_family_status_idx'),
+            models.Index(fields=['family', 'status', '-delivered_at'], name='marketlist_family_dlv_idx'),
+            models.Index(fields=['family', 'status', '-declined_at'], name='marketlist_family_dcl_idx'),
+            # management dashboard history pages
+            models.Index(fields=['status', '-delivered_at'], name='marketlist_delivered_idx'),
+            models.Index(fields=['status', '-declined_at'], name='marketlist_declined_idx'),
+        ]
+
+    def render_content(self):
+        """Recompute content_preview / content_numbered from content."""
+        from .templatetags.shop_extras import first_three_preview, numbered_list
+        self.content_preview = first_three_preview(self.content)
+        self.content_numbered = numbered_list(self.content)
 
     def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.render_content()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'content_preview', 'content_numbered'}
         if not self.list_id:
+            if self.delivery_flow_id is None:
+                from .delivery_flow import current_flow_for
+                self.delivery_flow = current_flow_for(self.created_at or timezone.now())
             super().save(*args, **kwargs)  # First save to get pk
             self.list_id = f'Pack-{self.pk}'
             super().save(update_fields=['list_id'])
         else:
             super().save(*args, **kwargs)
+        from .caching import LISTS, bump_namespace
+        bump_namespace(LISTS)
 
 
 class SendStatusPreset(models.Model):
@@ -96,14 +136,60 @@ class SendStatusPreset(models.Model):
 
 class MarketListItem(models.Model):
     """Individual item in a market list (optional structured storage)."""
+    SOURCE_CHOICES = [
+        ('parsed', 'Parsed from the list text'),
+        ('manual', 'Entered by hand'),
+    ]
     market_list = models.ForeignKey(MarketList, on_delete=models.CASCADE, related_name='items')
+    position = models.PositiveIntegerField(default=0)
     item_name = models.CharField(max_length=200)
     quantity = models.CharField(max_length=100, blank=True)
+    # Filled by list_items.build_items for consolidation: grouping key and the quantity in a canonical unit
+    name_key = models.CharField(max_length=200, blank=True)
+    amount = models.DecimalField(max_digits=12, decimal_places=3, null=True, blank=True)
+    unit = models.CharField(max_length=10, blank=True)
+    # Parsed rows are rewritten whenever the list text is saved; rows entered by hand are kept
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default='manual', editable=False)
+
+    class Meta:
+        ordering = ['market_list', 'position']
+        indexes = [
+            models.Index(fields=['item_name'], name='marketlistitem_name_idx'),
+            models.Index(fields=['name_key', 'unit'], name='marketlistitem_key_unit_idx'),
+        ]
 
     def __str__(self):
         return f"{self.item_name} - {self.quantity}"
 
 
+class ConsolidatedItem(models.Model):
+    """
+    Materialized consolidated list: the MarketListItem totals of one name/unit over
+    every list with a given status and delivery flow. Kept current by
+    consolidated.consolidated_delta(); `manage.py rebuild_consolidated` recomputes it.
+    """
+    NO_FLOW = -1  # delivery_flow_pk for lists outside every delivery flow
+
+    status = models.CharField(max_length=20)
+    # MarketList.delivery_flow_id (NO_FLOW instead of NULL so the unique constraint covers it)
+    delivery_flow_pk = models.BigIntegerField(default=NO_FLOW)
+    name_key = models.CharField(max_length=200)
+    unit = models.CharField(max_length=10, blank=True)
+    item_name = models.CharField(max_length=200)
+    total = models.DecimalField(max_digits=15, decimal_places=3, default=0)
+    untallied = models.IntegerField(default=0)  # lines without a quantity
+    line_count = models.IntegerField(default=0)
+    first_item_id = models.BigIntegerField(default=0)  # keeps the order items first appeared in
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['status', 'delivery_flow_pk', 'name_key', 'unit'], name='consolidateditem_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.item_name} ({self.status}/{self.delivery_flow_pk}): {self.total} {self.unit}"
+
+
 class Notice(models.Model):
     """Single notice from admin shown on all user profiles."""
     content = models.TextField(blank=True)
@@ -114,15 +200,22 @@ class Notice(models.Model):
 
     @classmethod
     def get_latest(cls):
-        obj = cls.objects.first()
-        if obj is None:
-            obj = cls.objects.create(content='')
-        return obj
+        """The notice, or an unsaved empty one (saving it creates the row)."""
+        return cls.objects.first() or cls(content='')
+
+
+MESSAGE_PREVIEW_LENGTH = 100
 
 
 class Conversation(models.Model):
     """One conversation between a user and admin."""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='admin_conversation')
+    # Activity counters kept in step with Message rows (see Message.save / mark_read);
+    # rebuild with `manage.py rebuild_conversation_activity`
+    last_message_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    last_message_preview = models.CharField(max_length=MESSAGE_PREVIEW_LENGTH, blank=True)
+    unread_for_user = models.PositiveIntegerField(default=0)
+    unread_for_staff = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ['-id']
@@ -130,6 +223,66 @@ class Conversation(models.Model):
     def __str__(self):
         return f"Conv with {self.user.username}"
 
+    def mark_read(self, reader):
+        """Mark everything the other side sent as read and zero reader's counter."""
+        with transaction.atomic():
+            unread = self.messages.filter(read_at__isnull=True)
+            if reader.is_staff:
+                marked = unread.filter(sender_id=self.user_id).update(read_at=timezone.now())
+                field = 'unread_for_staff'
+            else:
+                marked = unread.exclude(sender_id=self.user_id).update(read_at=timezone.now())
+                field = 'unread_for_user'
+            Conversation.objects.filter(pk=self.pk).update(**{field: 0})
+            if marked:
+                # Other open tabs of the reader's side clear their badge
+                from .events import publish
+                publish('unread', {'conversation_user': self.user_id, 'unread': 0},
+                        user_id=None if reader.is_staff else self.user_id, to_staff=reader.is_staff)
+        setattr(self, field, 0)
+
+    @classmethod
+    def rebuild_activity(cls):
+        """Recompute every conversation's counters from Message in one UPDATE; returns rows updated."""
+        return cls.objects.update(**conversation_activity_expressions())
+
+
+def message_preview(message):
+    """Inbox preview text for a message (mirrors the SQL in conversation_activity_expressions)."""
+    if message.body:
+        return message.body[:MESSAGE_PREVIEW_LENGTH]
+    if message.image:
+        return '📷 ছবি'
+    if message.file:
+        return '📎 ফাইল'
+    return ''
+
+
+def conversation_activity_expressions():
+    """UPDATE expressions for Conversation's activity counters."""
+    messages = Message.objects.filter(conversation=OuterRef('pk'))
+    last = messages.order_by('-created_at', '-pk')
+    has_image = Q(image__isnull=False) & ~Q(image='')
+    has_file = Q(file__isnull=False) & ~Q(file='')
+    preview = Case(
+        When(~Q(body=''), then=Substr('body', 1, MESSAGE_PREVIEW_LENGTH)),
+        When(has_image, then=Value('📷 ছবি')),
+        When(has_file, then=Value('📎 ফাইল')),
+        default=Value(''),
+        output_field=models.CharField(),
+    )
+
+    def unread(sender_filter):
+        counted = messages.filter(sender_filter, read_at__isnull=True).values('conversation')
+        return Coalesce(Subquery(counted.annotate(n=Count('pk')).values('n')[:1]), 0)
+
+    return {
+        'last_message_at': Subquery(last.values('created_at')[:1]),
+        'last_message_preview': Coalesce(Subquery(last.annotate(preview=preview).values('preview')[:1]), Value('')),
+        'unread_for_user': unread(~Q(sender=OuterRef('user'))),
+        'unread_for_staff': unread(Q(sender=OuterRef('user'))),
+    }
+
 
 class Message(models.Model):
     """Message in user-admin conversation; supports text, image, file."""
@@ -143,10 +296,50 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Unread badge / inbox counts only look at unread rows
+            models.Index(fields=['conversation', 'sender'], name='message_unread_idx', condition=models.Q(read_at__isnull=True)),
+        ]
 
     def __str__(self):
         return f"বার্তা #{self.id}"
 
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            return super().save(*args, **kwargs)
+        # New message: bump the conversation's counters in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            conv = self.conversation
+            changes = {'last_message_at': self.created_at, 'last_message_preview': message_preview(self)}
+            from_staff = self.sender_id != conv.user_id
+            counter = 'unread_for_user' if from_staff else 'unread_for_staff'
+            if self.read_at is None:
+                changes[counter] = F(counter) + 1
+            Conversation.objects.filter(pk=conv.pk).update(**changes)
+            from .events import publish
+            publish('message', {
+                'conversation_user': conv.user_id,
+                'from_staff': from_staff,
+                'preview': changes['last_message_preview'],
+                'unread': Conversation.objects.values_list(counter, flat=True).get(pk=conv.pk),
+            }, user_id=conv.user_id if from_staff else None, to_staff=not from_staff)
+
+
+class LiveEvent(models.Model):
+    """Outbox row for the live event stream (shop.events); pruned after a day."""
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='live_events')
+    to_staff = models.BooleanField(default=False)
+    kind = models.CharField(max_length=30)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.kind} #{self.id}"
+
 
 class MarketListComment(models.Model):
     """Comment/thread on a market list - management and user can discuss."""
@@ -186,6 +379,11 @@ class PathwayImage(models.Model):
     """Single image in a pathway - ordered by position."""
     pathway = models.ForeignKey(Pathway, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='pathway_images/%Y/%m/')
+    # Filled with the thumbnail on upload/replace (not width_field/height_field: those
+    # re-open the file on every model load while they are empty)
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    thumbnail = models.ImageField(upload_to='pathway_images/thumbs/%Y/%m/', blank=True)
     position = models.PositiveIntegerField(default=0)
     note = models.TextField(blank=True)
 
@@ -211,3 +409,48 @@ class DeliveryFlow(models.Model):
     def __str__(self):
         base = self.label or self.name or 'Delivery Flow'
         return f"{base} ({self.start_time}–{self.end_time})"
+
+
+class ConfigVersion(models.Model):
+    """Change counter for admin-edited config (shop.site_config); worker caches reload when it moves."""
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class ExportJob(models.Model):
+    """Queued PDF export, rendered by `manage.py run_export_worker` (see shop.exports)."""
+    KIND_CHOICES = [
+        ('list_entry_all', 'All lists PDF'),
+        ('consolidated', 'Consolidated list PDF'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='export_jobs')
+    result_file = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed by the run rendering the job (exports.beat); stale ones are requeued
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Worker picks the oldest queued jobs
+            models.Index(fields=['status', 'created_at'], name='exportjob_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
+
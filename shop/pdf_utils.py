@@ -1,13 +1,36 @@
 """
 PDF generation utilities with Bengali/Unicode font support.
 Uses Noto Sans Bengali for clear, readable Bangla in PDFs.
+
+Fonts are loaded once per worker: the font file lookup, the ReportLab
+registration and styles, and per fpdf2 style the parsed metrics plus the font
+bytes. Each new fpdf2 document copies the metrics and opens its own lazy TTFont
+from memory, because output subsets the font tables in place. warm_pdf_fonts()
+does all of it up front when PDF_FONT_WARMUP is on (see ShopConfig.ready).
 """
+import copy
+import glob
+import hashlib
+import logging
 import os
+import tempfile
+import threading
+from io import BytesIO
 from django.conf import settings
 from xml.sax.saxutils import escape
 
-_BANGLA_FONT_REGISTERED = False
-_BANGLA_FONT_NAME = 'Helvetica'  # fallback
+logger = logging.getLogger(__name__)
+
+_UNSET = object()
+# fpdf2 font attributes add_bengali_fonts() sets on its copies (fpdf2 2.8)
+_FPDF2_FONT_ATTRS = ('i', 'ttfont')
+_font_lock = threading.Lock()
+_font_cache = {
+    'fpdf2_path': _UNSET,    # _get_bengali_font_path()
+    'reportlab_font': _UNSET,  # registered ReportLab font name or None
+    'styles': {},            # font name -> get_pdf_styles() dict
+    'fpdf2_fonts': {},       # (family, style) -> parsed TTFFont prototype
+}
 
 
 def _escape_for_paragraph(text):
@@ -18,11 +41,16 @@ def _escape_for_paragraph(text):
 
 
 def _find_bengali_font():
-    """Find and register a Bengali-supporting font. Prefers Noto Sans Bengali."""
-    global _BANGLA_FONT_REGISTERED, _BANGLA_FONT_NAME
-    if _BANGLA_FONT_REGISTERED:
-        return _BANGLA_FONT_NAME
+    """Find and register a Bengali-supporting font once per worker. Prefers Noto Sans Bengali."""
+    if _font_cache['reportlab_font'] is not _UNSET:
+        return _font_cache['reportlab_font']
+    with _font_lock:
+        if _font_cache['reportlab_font'] is _UNSET:
+            _font_cache['reportlab_font'] = _register_reportlab_font()
+    return _font_cache['reportlab_font']
 
+
+def _register_reportlab_font():
     try:
         import reportlab.rl_config
         reportlab.rl_config.warnOnMissingFontGlyphs = 0
@@ -53,8 +81,6 @@ def _find_bengali_font():
                     italic=name,
                     boldItalic=name,
                 )
-                _BANGLA_FONT_REGISTERED = True
-                _BANGLA_FONT_NAME = name
                 return name
             except Exception:
                 continue
@@ -62,12 +88,19 @@ def _find_bengali_font():
 
 
 def get_pdf_styles(font_name=None):
-    """Get ParagraphStyles with Bengali font support."""
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-
+    """Get ParagraphStyles with Bengali font support (built once per font; treat as read-only)."""
     font = font_name or _find_bengali_font()
     if not font:
         font = 'Helvetica'
+    styles = _font_cache['styles'].get(font)
+    if styles is None:
+        styles = _font_cache['styles'][font] = _build_pdf_styles(font)
+    return styles
+
+
+def _build_pdf_styles(font):
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
     base = getSampleStyleSheet()
 
     title_style = ParagraphStyle(
@@ -117,7 +150,14 @@ def safe_paragraph_bold(style, text):
 
 
 def _get_bengali_font_path():
-    """Return path to a Bengali+Latin supporting TTF font. Nirmala has both on Windows."""
+    """Return path to a Bengali+Latin supporting TTF font (looked up once per worker)."""
+    if _font_cache['fpdf2_path'] is _UNSET:
+        _font_cache['fpdf2_path'] = _find_bengali_font_path()
+    return _font_cache['fpdf2_path']
+
+
+def _find_bengali_font_path():
+    """Nirmala has both Bengali and Latin on Windows."""
     base = str(settings.BASE_DIR)
     windir = os.environ.get('WINDIR') or os.environ.get('SYSTEMROOT') or 'C:\\Windows'
     paths = [
@@ -133,6 +173,95 @@ def _get_bengali_font_path():
     return None
 
 
+def add_bengali_fonts(pdf, font_path, family='Bangla', styles=('', 'B')):
+    """
+    pdf.add_font(family, style, font_path) for each style, reusing the metrics parsed
+    once per worker. fpdf2 subsets the font tables in place on output, so every
+    document still gets its own (lazily loaded, in-memory) TTFont.
+
+    The reuse relies on fpdf2 internals (pdf.fonts entries and their i / ttfont
+    attributes; checked against the fpdf2 version pinned in requirements.txt).
+    When they are not there, fonts are added the plain way.
+    """
+    for style in styles:
+        fontkey = f'{family.lower()}{style}'
+        proto = _fpdf2_font_prototype(family, style, font_path)
+        if proto is None or not isinstance(getattr(pdf, 'fonts', None), dict) or fontkey in pdf.fonts:
+            pdf.add_font(family, style, font_path, uni=True)
+            continue
+        try:
+            from fontTools.ttLib import TTFont
+            font_obj, font_bytes = proto
+            font = copy.deepcopy(font_obj)
+            font.i = len(pdf.fonts) + 1
+            font.ttfont = TTFont(BytesIO(font_bytes), recalcTimestamp=False, lazy=True)
+        except (AttributeError, TypeError, ImportError):
+            logger.warning('Reusing parsed font %s failed; adding it from the file', font_path, exc_info=True)
+            pdf.add_font(family, style, font_path, uni=True)
+            continue
+        pdf.fonts[fontkey] = font
+
+
+def _fpdf2_font_prototype(family, style, font_path):
+    """(parsed TTFFont, font file bytes) for family/style, or None if fpdf2 cannot load it."""
+    key = (family, style, font_path)
+    cached = _font_cache['fpdf2_fonts'].get(key, _UNSET)
+    if cached is not _UNSET:
+        return cached
+    with _font_lock:
+        if key not in _font_cache['fpdf2_fonts']:
+            proto = None
+            try:
+                from fpdf import FPDF
+                scratch = FPDF()
+                scratch.add_font(family, style, font_path, uni=True)
+                font_obj = scratch.fonts[f'{family.lower()}{style}']
+                if all(hasattr(font_obj, attr) for attr in _FPDF2_FONT_ATTRS):
+                    with open(font_path, 'rb') as fh:
+                        proto = (font_obj, fh.read())
+            except Exception:
+                proto = None
+            _font_cache['fpdf2_fonts'][key] = proto
+    return _font_cache['fpdf2_fonts'][key]
+
+
+def warm_pdf_fonts():
+    """Load fonts and styles for both PDF paths now instead of on the first request."""
+    font_path = _get_bengali_font_path()
+    if font_path:
+        for style in ('', 'B'):
+            _fpdf2_font_prototype('Bangla', style, font_path)
+    try:
+        get_pdf_styles()
+    except ImportError:
+        pass
+
+
+LIST_ENTRY_PDF_TITLE = 'লিস্ট এন্ট্রি - সব লিস্ট (পিডিএফ)'
+LIST_ENTRY_PDF_EMPTY = 'কোনো লিস্ট নেই।'
+
+
+def _pdf_text(text):
+    return (text or '').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def list_entry_blocks(lists):
+    """
+    Text of each list in the all-lists PDF, shared by the fpdf2 and ReportLab
+    renderers so both print the same thing. Consumes lists lazily (works with
+    a queryset iterator), yielding (header, date_line, content, ai_content or '').
+    """
+    for idx, lst in enumerate(lists, 1):
+        name = getattr(lst, 'user_display_name', None) or lst.family.username
+        dt = lst.created_at.strftime('%d/%m/%Y %H:%M') if lst.created_at else '-'
+        yield (
+            f'সিরিয়াল: {idx} | লিস্ট: {lst.list_id} | ব্যবহারকারী: {name}',
+            f'তারিখ: {dt}',
+            _pdf_text(lst.content) or '—',
+            _pdf_text(lst.ai_content),
+        )
+
+
 def generate_list_entry_pdf_fpdf2(lists):
     """Generate list entry PDF using fpdf2 (better Bengali support). Returns bytes or None."""
     try:
@@ -147,41 +276,94 @@ def generate_list_entry_pdf_fpdf2(lists):
         pdf.set_auto_page_break(True, margin=18)
         pdf.add_page()
         pdf.set_margins(18, 18, 18)
-        pdf.add_font('Bangla', '', font_path, uni=True)
-        pdf.add_font('Bangla', 'B', font_path, uni=True)
+        add_bengali_fonts(pdf, font_path)
     except Exception:
         return None
     w = pdf.epw
     pdf.set_font('Bangla', '', 11)
     pdf.ln(5)
     pdf.set_font('Bangla', 'B', 16)
-    pdf.multi_cell(w, 8, 'লিস্ট এন্ট্রি - সব লিস্ট (পিডিএফ)', align='C')
+    pdf.multi_cell(w, 8, LIST_ENTRY_PDF_TITLE, align='C')
     pdf.ln(8)
-    if not lists:
-        pdf.set_font('Bangla', '', 10)
-        pdf.multi_cell(w, 5, 'কোনো লিস্ট নেই।')
-        return pdf.output(dest='S')
-    for idx, lst in enumerate(lists, 1):
-        name = getattr(lst, 'user_display_name', lst.family.username)
+    count = 0
+    # Each list is written as it arrives, so only the current row is held in Python
+    for header, date_line, content, ai_content in list_entry_blocks(lists):
+        count += 1
         pdf.set_font('Bangla', 'B', 11)
-        pdf.multi_cell(w, 6, f'সিরিয়াল: {idx} | লিস্ট: {lst.list_id} | ব্যবহারকারী: {name}')
+        pdf.multi_cell(w, 6, header)
         pdf.set_font('Bangla', '', 10)
-        dt = lst.created_at.strftime('%d/%m/%Y %H:%M') if lst.created_at else '-'
-        pdf.multi_cell(w, 5, f'তারিখ: {dt}')
+        pdf.multi_cell(w, 5, date_line)
         pdf.set_font('Bangla', 'B', 10)
         pdf.multi_cell(w, 5, 'মূল লিস্ট:')
         pdf.set_font('Bangla', '', 10)
-        content = (lst.content or '—').replace('\r\n', '\n').replace('\r', '\n')
         pdf.multi_cell(w, 5, content)
-        if lst.ai_content:
+        if ai_content:
             pdf.set_font('Bangla', 'B', 10)
             pdf.multi_cell(w, 5, 'AI লিস্ট:')
             pdf.set_font('Bangla', '', 10)
-            pdf.multi_cell(w, 5, lst.ai_content.replace('\r\n', '\n').replace('\r', '\n'))
+            pdf.multi_cell(w, 5, ai_content)
         pdf.ln(6)
+    if not count:
+        pdf.set_font('Bangla', '', 10)
+        pdf.multi_cell(w, 5, LIST_ENTRY_PDF_EMPTY)
     return pdf.output(dest='S')
 
 
+class _LazyFlowables(list):
+    """
+    Flowable list for Platypus that is filled from a generator as the document
+    is laid out. build() checks len() before every flowable, so keeping a few
+    queued is enough (keepWithNext looks one ahead) and the full story is never
+    built up front.
+    """
+    LOOKAHEAD = 16
+
+    def __init__(self, source):
+        super().__init__()
+        self._source = iter(source)
+
+    def __len__(self):
+        while self._source is not None and super().__len__() < self.LOOKAHEAD:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+        return super().__len__()
+
+
+def generate_list_entry_pdf_reportlab(lists):
+    """Same document as generate_list_entry_pdf_fpdf2 with ReportLab. Returns bytes or None."""
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import cm
+        from reportlab.platypus import SimpleDocTemplate, Spacer
+    except ImportError:
+        return None
+    st = get_pdf_styles()
+
+    def story():
+        yield safe_paragraph(st['title'], LIST_ENTRY_PDF_TITLE)
+        yield Spacer(1, 16)
+        count = 0
+        for header, date_line, content, ai_content in list_entry_blocks(lists):
+            count += 1
+            yield safe_paragraph_bold(st['heading'], header)
+            yield safe_paragraph(st['body'], date_line)
+            yield safe_paragraph_bold(st['body'], 'মূল লিস্ট:')
+            yield safe_paragraph(st['body'], content)
+            if ai_content:
+                yield safe_paragraph_bold(st['body'], 'AI লিস্ট:')
+                yield safe_paragraph(st['body'], ai_content)
+            yield Spacer(1, 14)
+        if not count:
+            yield safe_paragraph(st['body'], LIST_ENTRY_PDF_EMPTY)
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
+    doc.build(_LazyFlowables(story()))
+    return buffer.getvalue()
+
+
 def generate_consolidated_pdf_fpdf2(all_lines, dt, title='সম্মিলিত বাজার পয়েন্ট', pre_numbered=False):
     """Consolidated list PDF with fpdf2. pre_numbered=True if lines already have '১. ' etc."""
     try:
@@ -196,8 +378,7 @@ def generate_consolidated_pdf_fpdf2(all_lines, dt, title='সম্মিলি
     pdf.add_page()
     pdf.set_margins(18, 18, 18)
     try:
-        pdf.add_font('Bangla', '', font_path, uni=True)
-        pdf.add_font('Bangla', 'B', font_path, uni=True)
+        add_bengali_fonts(pdf, font_path)
     except Exception:
         return None
     w = pdf.epw
@@ -212,3 +393,75 @@ def generate_consolidated_pdf_fpdf2(all_lines, dt, title='সম্মিলি
             txt = line if pre_numbered else f'{i}. {line}'
             pdf.multi_cell(w, 5, txt)
     return pdf.output(dest='S')
+
+
+def list_entry_pdf_bytes(lists):
+    """All-lists PDF (fpdf2, ReportLab fallback) as bytes; None if neither is installed."""
+    pdf_bytes = generate_list_entry_pdf_fpdf2(lists)
+    if pdf_bytes:
+        return bytes(pdf_bytes)
+    return generate_list_entry_pdf_reportlab(lists)
+
+
+def consolidated_pdf_bytes(merged_lines, dt):
+    """Consolidated list PDF (fpdf2, ReportLab fallback) as bytes; None if neither is installed."""
+    pdf_bytes = generate_consolidated_pdf_fpdf2(merged_lines, dt, title='Consolidated List', pre_numbered=True)
+    if pdf_bytes:
+        return bytes(pdf_bytes)
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import cm
+        from reportlab.platypus import SimpleDocTemplate, Spacer
+    except ImportError:
+        return None
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
+    st = get_pdf_styles()
+    story = [safe_paragraph(st['title'], 'সম্মিলিত লিস্ট'), Spacer(1, 16)]
+    for line in merged_lines:
+        story.append(safe_paragraph(st['body'], line))
+        story.append(Spacer(1, 4))
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def pdf_cache_key(*parts):
+    """Content hash of everything that goes into a generated PDF (used as file name and ETag)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()[:32]
+
+
+def _pdf_cache_dir():
+    path = str(settings.PDF_CACHE_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_cached_pdf(prefix, key):
+    """Path of the cached PDF for prefix/key, or None on a miss."""
+    path = os.path.join(_pdf_cache_dir(), f'{prefix}-{key}.pdf')
+    return path if os.path.isfile(path) else None
+
+
+def store_cached_pdf(prefix, key, pdf_bytes):
+    """
+    Write pdf_bytes as the cached PDF for prefix/key and return its path. Older
+    files with the same prefix (same report, previous content) are removed, so a
+    change to any list in the report invalidates the old file.
+    """
+    directory = _pdf_cache_dir()
+    path = os.path.join(directory, f'{prefix}-{key}.pdf')
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as fh:
+        fh.write(bytes(pdf_bytes))
+    os.replace(tmp, path)
+    for old in glob.glob(os.path.join(glob.escape(directory), glob.escape(prefix) + '-*.pdf')):
+        if old != path and len(os.path.basename(old)) == len(os.path.basename(path)):
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    return path
@@ -0,0 +1,35 @@
+"""
+Read queries shared by the list-entry views and the background exports
+(shop.exports), which render the same lists and consolidated lines as PDFs.
+"""
+from .list_items import consolidated_items
+from .models import FamilyProfile, MarketList
+from .text_utils import number_lines
+
+LIST_EXPORT_CHUNK_SIZE = 500
+
+
+def list_entry_lists(filter_status):
+    """
+    Lists for the list-entry PDF with user_display_name attached, streamed in
+    chunks (family and profile joined in) so memory does not grow with the count.
+    """
+    lists = MarketList.objects.select_related('family__family_profile').order_by('-created_at', '-pk')
+    if filter_status != 'total':
+        lists = lists.filter(status=filter_status)
+    for lst in lists.iterator(chunk_size=LIST_EXPORT_CHUNK_SIZE):
+        try:
+            lst.user_display_name = lst.family.family_profile.display_name or lst.family.username
+        except FamilyProfile.DoesNotExist:
+            lst.user_display_name = lst.family.username
+        yield lst
+
+
+def merged_item_lines(statuses=None, flow_id=None):
+    """Numbered consolidated buying list (totals per item) for lists with these statuses."""
+    return number_lines(consolidated_items(statuses, flow_id))
+
+
+def consolidated_lines(filter_status, flow_id=None):
+    """Consolidated lines (per-item totals) for the consolidated list / PDF."""
+    return merged_item_lines(None if filter_status == 'total' else [filter_status], flow_id)
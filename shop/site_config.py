@@ -0,0 +1,128 @@
+"""
+Admin-edited configuration (notice, delivery flows, Send Order Status presets).
+
+Saves rewrite only the rows that differ from the submitted list and bump a
+ConfigVersion counter in the same transaction. Readers go through
+cached_config(): each worker keeps the loaded value next to the version it was
+loaded at and reads all counters in one query at most every
+VERSION_CHECK_INTERVAL seconds, so a dashboard render normally runs no config
+queries and every gunicorn worker sees a save within that interval.
+"""
+import time
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import ConfigVersion, Notice, SendStatusPreset
+
+NOTICE = 'notice'
+DELIVERY_FLOWS = 'delivery_flows'
+SEND_STATUS_PRESETS = 'send_status_presets'
+
+VERSION_CHECK_INTERVAL = 2
+
+_local = {'versions': {}, 'checked_at': None, 'values': {}}  # values: name -> (version, value)
+
+
+def config_version(name):
+    """Current version of config name (0 before its first save)."""
+    return ConfigVersion.objects.filter(name=name).values_list('version', flat=True).first() or 0
+
+
+def bump_config_version(name):
+    """Mark config name as changed; call inside the transaction that changes it."""
+    forget_config(name)
+    if ConfigVersion.objects.filter(name=name).update(version=F('version') + 1):
+        return
+    try:
+        with transaction.atomic():
+            ConfigVersion.objects.create(name=name, version=1)
+    except IntegrityError:
+        # Another writer created the row first
+        ConfigVersion.objects.filter(name=name).update(version=F('version') + 1)
+
+
+def forget_config(name=None):
+    """Drop this worker's copy of config name (all config if None) and re-read versions on next use."""
+    if name is None:
+        _local['values'].clear()
+    else:
+        _local['values'].pop(name, None)
+    _local['checked_at'] = None
+
+
+def cached_config(name, load):
+    """load() cached in this worker until config name's version moves."""
+    now = time.monotonic()
+    if _local['checked_at'] is None or now - _local['checked_at'] > VERSION_CHECK_INTERVAL:
+        _local['versions'] = dict(ConfigVersion.objects.values_list('name', 'version'))
+        _local['checked_at'] = now
+    version = _local['versions'].get(name, 0)
+    entry = _local['values'].get(name)
+    if entry is None or entry[0] != version:
+        # A save that lands while loading has a newer version, so the next check reloads it
+        entry = _local['values'][name] = (version, load())
+    return entry[1]
+
+
+def get_notice():
+    """The notice (unsaved and empty before the first one is written). Shared: do not modify."""
+    return cached_config(NOTICE, Notice.get_latest)
+
+
+def get_send_status_presets():
+    """Preset texts in display order."""
+    return cached_config(SEND_STATUS_PRESETS, lambda: tuple(SendStatusPreset.objects.values_list('text', flat=True)))
+
+
+def sync_rows_by_pk(queryset, wanted, fields):
+    """
+    Update or create one row of queryset per wanted field dict: a dict whose 'pk'
+    names an existing row updates that row (in one bulk_update, only if a field
+    differs), any other dict creates a row. Rows not named are left to the caller.
+    Call inside transaction.atomic(). Returns (rows in wanted order, rows written).
+    """
+    existing = {row.pk: row for row in queryset.select_for_update()}
+    rows, changed, created = [], [], []
+    for values in wanted:
+        values = dict(values)
+        pk = values.pop('pk', None)
+        row = existing.pop(pk, None) if pk is not None else None
+        if row is None:
+            row = queryset.model(**values)
+            created.append(row)
+        elif any(getattr(row, field) != values[field] for field in fields):
+            for field in fields:
+                setattr(row, field, values[field])
+            changed.append(row)
+        rows.append(row)
+    if changed:
+        queryset.model.objects.bulk_update(changed, fields)
+    if created:
+        queryset.model.objects.bulk_create(created)
+    return rows, len(changed) + len(created)
+
+
+def sync_ordered_rows(queryset, wanted, fields):
+    """
+    Make the rows of queryset (in its order) match wanted, a list of field dicts,
+    reusing rows by position: rows whose fields differ go in one bulk_update,
+    missing rows are bulk-created and leftover rows deleted. Call inside
+    transaction.atomic(). Returns (updated, created, deleted) row counts.
+    """
+    existing = list(queryset.select_for_update())
+    changed = []
+    for row, values in zip(existing, wanted):
+        if any(getattr(row, field) != values[field] for field in fields):
+            for field in fields:
+                setattr(row, field, values[field])
+            changed.append(row)
+    if changed:
+        queryset.model.objects.bulk_update(changed, fields)
+    created = [queryset.model(**values) for values in wanted[len(existing):]]
+    if created:
+        queryset.model.objects.bulk_create(created)
+    stale = [row.pk for row in existing[len(wanted):]]
+    if stale:
+        queryset.model.objects.filter(pk__in=stale).delete()
+    return len(changed), len(created), len(stale)
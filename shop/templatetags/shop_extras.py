@@ -1,6 +1,11 @@
+from datetime import datetime
+from functools import lru_cache
+
 from django import template
 from django.utils import timezone
 
+from ..text_utils import clean_lines, first_lines, number_lines, strip_number_prefix
+
 register = template.Library()
 
 
@@ -9,8 +14,7 @@ def numbered_list(value):
     """Format content as numbered list: split by newlines, trim, remove empty, number."""
     if not value:
         return ''
-    lines = [s.strip() for s in str(value).splitlines() if s.strip()]
-    return '\n'.join(f'{i}. {line}' for i, line in enumerate(lines, 1))
+    return '\n'.join(number_lines(clean_lines(value), bengali=False))
 
 
 @register.filter
@@ -18,16 +22,10 @@ def first_three_preview(value):
     """2 lines, number points. Max 4 items so no incomplete point at line end."""
     if not value:
         return '-'
-    import re
-    lines = [s.strip() for s in str(value).splitlines() if s.strip()]
-    if not lines:
-        return '-'
-    def strip_number(txt):
-        return re.sub(r'^[\d\u09E6-\u09EF\u0966-\u096F]+\s*[\.\)]\s*', '', txt, count=1).strip() or txt
-    items = [strip_number(line) for line in lines]
     # Show max 3 items so 2-line clamp never cuts an incomplete number
-    take = items[:3]
-    numbered = [f'{i}. {item}' for i, item in enumerate(take, 1)]
+    numbered = number_lines([strip_number_prefix(line) for line in first_lines(value, 3)], bengali=False)
+    if not numbered:
+        return '-'
     if len(numbered) == 1:
         return numbered[0]
     if len(numbered) == 2:
@@ -65,6 +63,18 @@ def date_ampm(value):
 @register.filter
 def date_card(value):
     """Format datetime for bazar list cards: 10Feb 2026 (11:56 PM)."""
+    if isinstance(value, datetime):
+        # Card dates do not change once set: format each (datetime, timezone) once per worker
+        return _date_card_cached(value, timezone.get_current_timezone())
+    return _date_card(value)
+
+
+@lru_cache(maxsize=4096)
+def _date_card_cached(value, tz):
+    return _date_card(value)
+
+
+def _date_card(value):
     if value is None:
         return ''
     try:
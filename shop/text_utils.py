@@ -0,0 +1,86 @@
+"""
+Line cleaning and numbering for market list text, shared by the views, template
+filters, item parser and PDFs.
+
+Patterns are compiled once at import and digits are converted with str.translate
+tables, so per-card template filters do no regex compilation or per-character
+Python work.
+"""
+import re
+
+BENGALI_DIGITS = '০১২৩৪৫৬৭৮৯'
+TO_ASCII_DIGITS = str.maketrans(BENGALI_DIGITS, '0123456789')
+TO_BENGALI_DIGITS = str.maketrans('0123456789', BENGALI_DIGITS)
+
+# "১. " / "12) " numbering added by users or organize_list (\d also covers Bengali
+# and Devanagari digits). A bare leading number is a quantity ("২ কেজি আলু") and
+# "1.5l" is a decimal, not "1." + "5l".
+NUMBER_PREFIX_RE = re.compile(r'^\d+\s*[.)](?!\d)[ \t]*')
+
+
+def bengali_number(n):
+    """Integer n in Bengali digits (12 -> '১২')."""
+    return str(n).translate(TO_BENGALI_DIGITS)
+
+
+def to_ascii_digits(text):
+    return text.translate(TO_ASCII_DIGITS)
+
+
+def clean_lines(text):
+    """Stripped, non-empty lines of text."""
+    if not text:
+        return []
+    return [line for line in map(str.strip, str(text).splitlines()) if line]
+
+
+def clean_content(text):
+    """text with every line stripped and blank lines removed (how lists are stored)."""
+    return '\n'.join(clean_lines(text))
+
+
+def strip_number_prefix(line):
+    """Line without a leading '১. ' / '1) ' point number (the line itself if nothing else is left)."""
+    return NUMBER_PREFIX_RE.sub('', line, count=1).strip() or line
+
+
+def first_lines(text, limit):
+    """Up to limit cleaned lines from the start of text, without splitting the rest."""
+    lines = []
+    start = 0
+    text = str(text)
+    while len(lines) < limit and start <= len(text):
+        end = text.find('\n', start)
+        if end < 0:
+            end = len(text)
+        line = text[start:end].strip()
+        if line:
+            lines.append(line)
+        start = end + 1
+    return lines
+
+
+def number_lines(lines, bengali=True):
+    """['১. a', '২. b', ...] (ASCII numbers when bengali is False)."""
+    if bengali:
+        return [f'{bengali_number(i)}. {line}' for i, line in enumerate(lines, 1)]
+    return [f'{i}. {line}' for i, line in enumerate(lines, 1)]
+
+
+def organize_list(content):
+    """Clean lines, drop repeated points (case-insensitive) and number them in Bengali."""
+    if not content or not content.strip():
+        return content or ''
+    seen = set()
+    unique = []
+    for line in clean_lines(content):
+        key = line.lower()
+        if key not in seen:
+            seen.add(key)
+            unique.append(line)
+    return '\n'.join(number_lines(unique))
+
+
+def clean_lines_many(texts):
+    """clean_lines() for each of texts (point numbers are kept; see strip_number_prefix)."""
+    return [clean_lines(t) for t in texts]
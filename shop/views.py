@@ -1,4 +1,5 @@
 from datetime import datetime, date, timedelta
+from io import BytesIO
 import json
 
 from django.shortcuts import render, redirect, get_object_or_404
@@ -8,14 +9,33 @@ from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils import timezone
+from django.utils.http import parse_etags
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
-from django.db.models import Q, Max
+from django.http import Http404, JsonResponse, HttpResponse, HttpResponseNotModified, FileResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.core.files.storage import default_storage
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Q, F, Max, Count, Sum
 from django.views.decorators.http import require_GET, require_POST
 from django.views.decorators.clickjacking import xframe_options_sameorigin
 
-from .models import MarketList, FamilyProfile, Notice, Conversation, Message, MarketListComment, Pathway, PathwayImage, DeliveryFlow, SendStatusPreset
+from .models import MarketList, FamilyProfile, Notice, Conversation, Message, MarketListComment, Pathway, PathwayImage, DeliveryFlow, SendStatusPreset, ExportJob
 from .forms import FamilyRegistrationForm, MarketListForm, NoticeForm, MessageForm, MarketListCommentForm, ProfileEditForm, PasswordChangeForm, AdminMarketListEditForm
+from .delivery_flow import get_flow_table, invalidate_flow_table, backfill_delivery_flows
+from .site_config import (
+    DELIVERY_FLOWS, NOTICE, SEND_STATUS_PRESETS, bump_config_version, get_notice, get_send_status_presets,
+    sync_ordered_rows, sync_rows_by_pk,
+)
+from .image_utils import resize_to_jpeg, pathway_thumbnail
+from .events import STAFF, publish_list_status, publish_list_statuses, stream_events
+from .exports import EXPORT_KINDS, enqueue_export, export_file_path
+from .caching import LISTS, cached
+from .consolidated import consolidated_delta
+from .list_items import sync_list_items
+from .queries import consolidated_lines, list_entry_lists, merged_item_lines
+from .text_utils import clean_content, clean_lines_many, organize_list
+from .templatetags.shop_extras import date_card
 
 
 def landing_page(request):
@@ -83,57 +103,44 @@ def user_logout(request):
 
 
 def _unread_message_count(user):
-    """Count messages received by user that are unread (from admin)."""
+    """Count messages received by user that are unread (from admin; staff: from every family)."""
     if user.is_staff:
-        return 0  # admin sees inbox, no single "unread" badge
-    try:
-        conv = user.admin_conversation
-        return conv.messages.filter(read_at__isnull=True).exclude(sender=user).count()
-    except Conversation.DoesNotExist:
-        return 0
+        return Conversation.objects.aggregate(n=Sum('unread_for_staff'))['n'] or 0
+    return Conversation.objects.filter(user=user).values_list('unread_for_user', flat=True).first() or 0
 
 
-@login_required
-def family_dashboard(request):
-    if request.user.is_staff:
-        return redirect('landing_page')
+def _family_dashboard_context(user, form):
+    """Context for family_dashboard.html (also re-rendered by send_market_list on form errors)."""
     # প্রধান হিস্টোরি: পেন্ডিং + অ্যাপ্রুভড
-    lists = MarketList.objects.filter(family=request.user, status__in=['pending', 'approved']).order_by('-created_at')
+    lists = MarketList.objects.filter(family=user, status__in=['pending', 'approved']).order_by('-created_at')
     # ডেলিভার্ড ফোল্ডার: তারিখ ও সময় অনুযায়ী
-    delivered_lists = MarketList.objects.filter(family=request.user, status='delivered').order_by('-delivered_at', '-created_at')
+    delivered_lists = MarketList.objects.filter(family=user, status='delivered').order_by(
+        F('delivered_at').desc(nulls_last=True), '-created_at')
     # ডিক্লাইন্ড ফোল্ডার: তারিখ ও সময় অনুযায়ী
-    declined_lists = MarketList.objects.filter(family=request.user, status='declined').order_by('-declined_at', '-created_at')
+    declined_lists = MarketList.objects.filter(family=user, status='declined').order_by(
+        F('declined_at').desc(nulls_last=True), '-created_at')
     # লিস্ট হিস্টোরিতে প্যাক নম্বরের পাশে Send Order Status (Delivery Flow অনুযায়ী)
-    flows = list(DeliveryFlow.objects.all().order_by('sort_order', 'id'))
-    lists_with_status = []
-    for lst in lists:
-        order_time = None
-        if lst.created_at:
-            dt = timezone.localtime(lst.created_at) if getattr(lst.created_at, 'tzinfo', None) else lst.created_at
-            order_time = dt.time()
-        flow_status = None
-        if order_time and flows:
-            for f in flows:
-                if f.start_time <= order_time <= f.end_time:
-                    flow_status = f.status_text or 'Approved'
-                    break
-        lists_with_status.append((lst, flow_status))
-    form = MarketListForm()
-    notice = Notice.get_latest()
-    unread_count = _unread_message_count(request.user)
+    lists_with_status = get_flow_table().classify(lists)
     try:
-        prof = request.user.family_profile
-        display_name = prof.display_name or request.user.username
+        prof = user.family_profile
+        display_name = prof.display_name or user.username
         profile_avatar = prof.avatar if prof.avatar else None
     except FamilyProfile.DoesNotExist:
-        display_name = request.user.username
+        display_name = user.username
         profile_avatar = None
-    return render(request, 'shop/family_dashboard.html', {
+    return {
         'lists': lists, 'lists_with_status': lists_with_status,
         'delivered_lists': delivered_lists, 'declined_lists': declined_lists,
-        'form': form, 'notice': notice, 'unread_message_count': unread_count,
+        'form': form, 'notice': get_notice(), 'unread_message_count': _unread_message_count(user),
         'display_name': display_name, 'profile_avatar': profile_avatar,
-    })
+    }
+
+
+@login_required
+def family_dashboard(request):
+    if request.user.is_staff:
+        return redirect('landing_page')
+    return render(request, 'shop/family_dashboard.html', _family_dashboard_context(request.user, MarketListForm()))
 
 
 @login_required
@@ -145,9 +152,7 @@ def send_market_list(request):
         form = MarketListForm(request.POST)
         if form.is_valid():
             market_list = form.save(commit=False)
-            content = (market_list.content or '').strip()
-            lines = [s.strip() for s in content.splitlines() if s.strip()]
-            market_list.content = '\n'.join(lines)
+            market_list.content = clean_content(market_list.content)
             market_list.family = request.user
             # New lists will be treated as approved immediately (no pending state)
             market_list.status = 'approved'
@@ -155,39 +160,13 @@ def send_market_list(request):
             market_list.save()
             # লিস্ট সাবমিট হলেই অটো AI দিয়ে জেনারেট
             if market_list.content:
-                market_list.ai_content = _ai_organize_list(market_list.content)
+                market_list.ai_content = organize_list(market_list.content)
                 market_list.save(update_fields=['ai_content'])
+            sync_list_items(market_list)
+            publish_list_status(market_list)
             return redirect(reverse('family_dashboard') + '?toast=sent')
         # ফর্ম ভ্যালিড না হলে ড্যাশবোর্ডে ফিরিয়ে পাঠান ভুল সহ
-        lists = MarketList.objects.filter(family=request.user, status__in=['pending', 'approved']).order_by('-created_at')
-        delivered_lists = MarketList.objects.filter(family=request.user, status='delivered').order_by('-delivered_at', '-created_at')
-        declined_lists = MarketList.objects.filter(family=request.user, status='declined').order_by('-declined_at', '-created_at')
-        flows = list(DeliveryFlow.objects.all().order_by('sort_order', 'id'))
-        lists_with_status = []
-        for lst in lists:
-            order_time = None
-            if lst.created_at:
-                dt = timezone.localtime(lst.created_at) if getattr(lst.created_at, 'tzinfo', None) else lst.created_at
-                order_time = dt.time()
-            flow_status = None
-            if order_time and flows:
-                for f in flows:
-                    if f.start_time <= order_time <= f.end_time:
-                        flow_status = f.status_text or 'Approved'
-                        break
-            lists_with_status.append((lst, flow_status))
-        notice = Notice.get_latest()
-        unread_count = _unread_message_count(request.user)
-        try:
-            display_name = request.user.family_profile.display_name or request.user.username
-        except FamilyProfile.DoesNotExist:
-            display_name = request.user.username
-        return render(request, 'shop/family_dashboard.html', {
-            'lists': lists, 'lists_with_status': lists_with_status,
-            'delivered_lists': delivered_lists, 'declined_lists': declined_lists,
-            'form': form, 'notice': notice, 'unread_message_count': unread_count,
-            'display_name': display_name,
-        })
+        return render(request, 'shop/family_dashboard.html', _family_dashboard_context(request.user, form))
     return redirect('family_dashboard')
 
 
@@ -203,14 +182,13 @@ def update_market_list(request, pk):
         form = MarketListForm(request.POST, instance=market_list)
         if form.is_valid():
             obj = form.save(commit=False)
-            content = (obj.content or '').strip()
-            lines = [s.strip() for s in content.splitlines() if s.strip()]
-            obj.content = '\n'.join(lines)
+            obj.content = clean_content(obj.content)
             obj.save()
             # আপডেট সাবমিট হলেই অটো AI দিয়ে জেনারেট
             if obj.content:
-                obj.ai_content = _ai_organize_list(obj.content)
+                obj.ai_content = organize_list(obj.content)
                 obj.save(update_fields=['ai_content'])
+            sync_list_items(obj)
             return redirect('family_dashboard')
     else:
         form = MarketListForm(instance=market_list)
@@ -239,19 +217,7 @@ def my_profile(request):
             avatar_file = request.FILES.get('avatar')
             if avatar_file:
                 try:
-                    from PIL import Image
-                    img = Image.open(avatar_file)
-                    img = img.convert('RGB')
-                    w, h = img.size
-                    size = 400
-                    if w > size or h > size:
-                        r = min(size / w, size / h)
-                        img = img.resize((int(w * r), int(h * r)), Image.Resampling.LANCZOS)
-                    from io import BytesIO
-                    from django.core.files.base import ContentFile
-                    out = BytesIO()
-                    img.save(out, format='JPEG', quality=85)
-                    profile.avatar.save('avatar_%s.jpg' % profile.user_id, ContentFile(out.getvalue()), save=True)
+                    profile.avatar.save('avatar_%s.jpg' % profile.user_id, resize_to_jpeg(avatar_file, 400), save=True)
                 except Exception:
                     pass
             return redirect('my_profile')
@@ -276,143 +242,137 @@ def delete_market_list(request, pk):
     if request.user.is_staff:
         return redirect('landing_page')
     market_list = get_object_or_404(MarketList, pk=pk, family=request.user)
-    market_list.delete()
+    with consolidated_delta([market_list.pk]):
+        market_list.delete()
     return redirect(reverse('family_dashboard') + '?toast=deleted')
 
 
 # === ADMIN VIEWS ===
 
+# Delivered/Declined history shown per page on the management dashboard
+DASHBOARD_HISTORY_PAGE_SIZE = 25
+
+
+def _attach_list_display(lists):
+    """Set user_display_name / user_avatar_url on lists fetched with family__family_profile."""
+    for lst in lists:
+        try:
+            profile = lst.family.family_profile
+        except FamilyProfile.DoesNotExist:
+            profile = None
+        lst.user_display_name = (profile.display_name if profile else '') or lst.family.username
+        try:
+            lst.user_avatar_url = profile.avatar.url if profile and profile.avatar else None
+        except Exception:
+            lst.user_avatar_url = None
+    return lists
+
+
+def _market_list_status_counts():
+    """All dashboard status counters from one conditional aggregate, cached until a list changes."""
+    return cached(LISTS, ['status_counts'], lambda: MarketList.objects.aggregate(
+        total_count=Count('pk', filter=~Q(status__in=['delivered', 'declined'])),
+        approved_count=Count('pk', filter=Q(status='approved')),
+        pending_count=Count('pk', filter=Q(status='pending')),
+        delivered_count=Count('pk', filter=Q(status='delivered')),
+        declined_count=Count('pk', filter=Q(status='declined')),
+    ))
+
+
+def _single_status_note(notes):
+    """Return the note if all given notes share one non-empty value, else ''."""
+    note_values = []
+    for note in notes:
+        note_clean = (note or '').strip()
+        if note_clean and note_clean not in note_values:
+            note_values.append(note_clean)
+            if len(note_values) > 1:
+                break
+    return note_values[0] if len(note_values) == 1 else ''
+
+
 @staff_member_required(login_url='management_login')
 def management_dashboard(request):
+    notice = get_notice()
+    notice_form = NoticeForm(instance=notice)
+    if request.method == 'POST' and request.POST.get('form_type') == 'notice':
+        # Bind a fresh row: the cached notice is shared by every request in this worker
+        notice_form = NoticeForm(request.POST, instance=Notice.get_latest())
+        if notice_form.is_valid():
+            with transaction.atomic():
+                notice_form.save()
+                bump_config_version(NOTICE)
+            return redirect('management_dashboard')
     filter_status = request.GET.get('filter', 'total')
     lists = MarketList.objects.all().select_related('family', 'family__family_profile')
+    page_obj = None
     if filter_status == 'approved':
         lists = lists.filter(status='approved')
     elif filter_status == 'pending':
         lists = lists.filter(status='pending')
-    elif filter_status == 'delivered':
-        lists = lists.filter(status='delivered')
-    elif filter_status == 'declined':
-        lists = lists.filter(status='declined')
+    elif filter_status in ('delivered', 'declined'):
+        # History grows every day: show it one page at a time
+        # Lists without a timestamp go last on every database (PostgreSQL puts NULLs first in DESC)
+        order_field = 'delivered_at' if filter_status == 'delivered' else 'declined_at'
+        lists = lists.filter(status=filter_status).order_by(F(order_field).desc(nulls_last=True), '-created_at')
+        page_obj = Paginator(lists, DASHBOARD_HISTORY_PAGE_SIZE).get_page(request.GET.get('page'))
     # 'late_transferred' status removed
     else:
         # Default "total" view: exclude delivered/declined/late_transferred so they move out once handled
         lists = lists.exclude(status__in=['delivered', 'declined', 'late_transferred'])
-    # filter=total or default: show all orders (no status filter)
-    for lst in lists:
-        try:
-            lst.user_display_name = lst.family.family_profile.display_name or lst.family.username
-            lst.user_avatar_url = lst.family.family_profile.avatar.url if lst.family.family_profile.avatar else None
-        except FamilyProfile.DoesNotExist:
-            lst.user_display_name = lst.family.username
-            lst.user_avatar_url = None
-        except Exception:
-            lst.user_avatar_url = None
-    # Delivered lists for toggle section on Total view (same display attrs)
-    delivered_qs = MarketList.objects.filter(status='delivered').select_related('family', 'family__family_profile').order_by('-delivered_at', '-created_at')
-    delivered_lists = []
-    for lst in delivered_qs:
-        try:
-            lst.user_display_name = lst.family.family_profile.display_name or lst.family.username
-            lst.user_avatar_url = lst.family.family_profile.avatar.url if lst.family.family_profile.avatar else None
-        except FamilyProfile.DoesNotExist:
-            lst.user_display_name = lst.family.username
-            lst.user_avatar_url = None
-        except Exception:
-            lst.user_avatar_url = None
-        delivered_lists.append(lst)
-    # Declined/Cancelled lists for toggle section on Total view
-    declined_qs = MarketList.objects.filter(status='declined').select_related('family', 'family__family_profile').order_by('-declined_at', '-created_at')
-    declined_lists = []
-    for lst in declined_qs:
-        try:
-            lst.user_display_name = lst.family.family_profile.display_name or lst.family.username
-            lst.user_avatar_url = lst.family.family_profile.avatar.url if lst.family.family_profile.avatar else None
-        except FamilyProfile.DoesNotExist:
-            lst.user_display_name = lst.family.username
-            lst.user_avatar_url = None
-        except Exception:
-            lst.user_avatar_url = None
-        declined_lists.append(lst)
-    total_count = MarketList.objects.exclude(status__in=['delivered', 'declined']).count()
-    approved_count = MarketList.objects.filter(status='approved').count()
-    pending_count = MarketList.objects.filter(status='pending').count()
-    delivered_count = MarketList.objects.filter(status='delivered').count()
-    declined_count = MarketList.objects.filter(status='declined').count()
-    late_transferred_count = 0
+    lists_qs = _attach_list_display(list(page_obj.object_list if page_obj else lists))
+    counts = _market_list_status_counts()
     # Delivery path setup pending: profiles with at least one path field empty (exclude deleted)
-    delivery_path_pending_count = FamilyProfile.objects.filter(is_deleted=False).filter(
-        Q(area_name='') | Q(section_no='') | Q(building_name='') |
-        Q(floor_no='') | Q(room_no='')
-    ).count()
-    trash_count = FamilyProfile.objects.filter(is_deleted=True).count()
-    notice = Notice.get_latest()
-    notice_form = NoticeForm(instance=notice)
-    if request.method == 'POST' and request.POST.get('form_type') == 'notice':
-        notice_form = NoticeForm(request.POST, instance=notice)
-        if notice_form.is_valid():
-            notice_form.save()
-            return redirect('management_dashboard')
-    lists_qs = list(lists)
-    merged_items = _get_merged_items_from_lists(lists_qs)
-    users_data = {}
-    for lst in lists_qs:
-        try:
-            display_name = lst.family.family_profile.display_name or lst.family.username
-        except FamilyProfile.DoesNotExist:
-            display_name = lst.family.username
-        uid = lst.family_id
-        if uid not in users_data:
-            users_data[uid] = {'display_name': display_name, 'lists': []}
-        users_data[uid]['lists'].append({
-            'pk': lst.pk,
-            'list_id': lst.list_id or f'Pack-{lst.pk}',
-            'created_at': lst.created_at,
-            'status': lst.get_status_display(),
-            'status_note': (lst.note or '').strip(),
-            'content': lst.content or '',
-            'ai_content': lst.ai_content or '',
-        })
-    total_notes_qs = MarketList.objects.exclude(status__in=['delivered', 'declined']).values_list('note', flat=True)
-    note_values = []
-    for note in total_notes_qs:
-        note_clean = (note or '').strip()
-        if note_clean and note_clean not in note_values:
-            note_values.append(note_clean)
-            if len(note_values) > 1:
-                break
-    status_override = note_values[0] if len(note_values) == 1 else ''
+    profile_counts = FamilyProfile.objects.aggregate(
+        delivery_path_pending_count=Count('pk', filter=Q(is_deleted=False) & (
+            Q(area_name='') | Q(section_no='') | Q(building_name='') |
+            Q(floor_no='') | Q(room_no='')
+        )),
+        trash_count=Count('pk', filter=Q(is_deleted=True)),
+    )
+    merged_items = []
+    users_list = []
+    status_override = ''
+    if filter_status not in ('approved', 'pending', 'delivered', 'declined'):
+        # Delivered / Declined toggle sections on Total view are fetched page by page via list_history
+        merged_items = merged_item_lines(ACTIVE_LIST_STATUSES)
+        users_data = {}
+        for lst in lists_qs:
+            uid = lst.family_id
+            if uid not in users_data:
+                users_data[uid] = {'display_name': lst.user_display_name, 'lists': []}
+            users_data[uid]['lists'].append({
+                'pk': lst.pk,
+                'list_id': lst.list_id or f'Pack-{lst.pk}',
+                'created_at': lst.created_at,
+                'status': lst.get_status_display(),
+                'status_note': (lst.note or '').strip(),
+                'content': lst.content or '',
+                'ai_content': lst.ai_content or '',
+            })
+        users_list = [
+            {'user_id': uid, 'display_name': data['display_name'], 'count': len(data['lists']), 'lists': data['lists']}
+            for uid, data in users_data.items()
+        ]
+        users_list.sort(key=lambda x: (x['display_name'].upper(), x['user_id']))
+        # Total view lists are exactly the active lists, so their notes need no extra scan
+        status_override = _single_status_note(lst.note for lst in lists_qs)
     # Delivery flow configuration (for Delivery Flow Set)
-    delivery_flows_qs = DeliveryFlow.objects.all().order_by('sort_order', 'id')
-    delivery_flows = []
-    for idx, f in enumerate(delivery_flows_qs, 1):
-        delivery_flows.append({
-            'name': f.name or f"Flow {idx}",
-            'label': f.label,
-            'start': f.start_time.strftime('%H:%M'),
-            'end': f.end_time.strftime('%H:%M'),
-            'statusText': f.status_text or 'Approved',
-        })
-    users_list = [
-        {'user_id': uid, 'display_name': data['display_name'], 'count': len(data['lists']), 'lists': data['lists']}
-        for uid, data in users_data.items()
-    ]
-    users_list.sort(key=lambda x: (x['display_name'].upper(), x['user_id']))
-    presets = list(SendStatusPreset.objects.values_list('text', flat=True))
+    delivery_flows = get_flow_table().as_dicts()
+    presets = list(get_send_status_presets())
 
     return render(request, 'shop/management_dashboard.html', {
         'lists': lists_qs,
-        'delivered_lists': delivered_lists,
-        'declined_lists': declined_lists,
+        'page_obj': page_obj,
         'filter_status': filter_status,
-        'total_count': total_count,
-        'approved_count': approved_count,
-        'pending_count': pending_count,
-        'delivered_count': delivered_count,
-        'declined_count': declined_count,
-        'late_transferred_count': late_transferred_count,
-        'delivery_path_pending_count': delivery_path_pending_count,
-        'trash_count': trash_count,
+        'total_count': counts['total_count'],
+        'approved_count': counts['approved_count'],
+        'pending_count': counts['pending_count'],
+        'delivered_count': counts['delivered_count'],
+        'declined_count': counts['declined_count'],
+        'late_transferred_count': 0,
+        'delivery_path_pending_count': profile_counts['delivery_path_pending_count'],
+        'trash_count': profile_counts['trash_count'],
         'notice': notice,
         'notice_form': notice_form,
         'merged_items': merged_items,
@@ -420,14 +380,75 @@ def management_dashboard(request):
         'status_override': status_override,
         'delivery_flows': delivery_flows,
         'send_status_presets': presets,
+        'unread_message_count': _unread_message_count(request.user),
     })
 
 
+# Timestamp each history status is keyed on for cursor pagination
+HISTORY_ORDER_FIELDS = {'delivered': 'delivered_at', 'declined': 'declined_at'}
+
+
+def _parse_history_cursor(cursor):
+    """Cursor is '<iso timestamp>|<pk>' (timestamp empty for legacy rows without one)."""
+    ts_raw, _, pk_raw = cursor.partition('|')
+    pk = int(pk_raw)
+    ts = datetime.fromisoformat(ts_raw) if ts_raw else None
+    return ts, pk
+
+
+@staff_member_required(login_url='management_login')
+@require_GET
+def list_history(request, status):
+    """API: one page of delivered/declined lists, newest first, for the dashboard toggles."""
+    field = HISTORY_ORDER_FIELDS.get(status)
+    if field is None:
+        return JsonResponse({'success': False, 'error': 'Invalid status'}, status=404)
+    qs = MarketList.objects.filter(status=status).select_related('family', 'family__family_profile')
+    cursor = (request.GET.get('cursor') or '').strip()
+    if cursor:
+        try:
+            ts, pk = _parse_history_cursor(cursor)
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Invalid cursor'}, status=400)
+        if ts is None:
+            qs = qs.filter(**{f'{field}__isnull': True, 'pk__lt': pk})
+        else:
+            qs = qs.filter(
+                Q(**{f'{field}__lt': ts}) | Q(**{field: ts, 'pk__lt': pk}) | Q(**{f'{field}__isnull': True})
+            )
+    qs = qs.order_by(F(field).desc(nulls_last=True), '-pk')
+    page = _attach_list_display(list(qs[:DASHBOARD_HISTORY_PAGE_SIZE + 1]))
+    next_cursor = None
+    if len(page) > DASHBOARD_HISTORY_PAGE_SIZE:
+        page = page[:DASHBOARD_HISTORY_PAGE_SIZE]
+        last = page[-1]
+        last_ts = getattr(last, field)
+        next_cursor = f"{last_ts.isoformat() if last_ts else ''}|{last.pk}"
+    lists = []
+    for lst in page:
+        lists.append({
+            'pk': lst.pk,
+            'list_id': lst.list_id or f'Pack-{lst.pk}',
+            'status': lst.status,
+            'created': lst.created_at.isoformat() if lst.created_at else '',
+            'created_display': date_card(lst.created_at),
+            'user_display_name': lst.user_display_name,
+            'user_avatar_url': lst.user_avatar_url,
+            'content': lst.content or '',
+            'ai_content': lst.ai_content or '',
+            'profile_url': reverse('user_profile_detail', args=[lst.family_id]),
+            'edit_url': reverse('admin_edit_list', args=[lst.pk]) + '?filter=total',
+            'restore_url': reverse('restore_list', args=[lst.pk]) if status == 'declined' else '',
+            'delete_url': reverse('admin_delete_list', args=[lst.pk]),
+            'ai_url': reverse('ai_generate_list', args=[lst.pk]),
+        })
+    return JsonResponse({'success': True, 'lists': lists, 'next_cursor': next_cursor})
+
+
 @staff_member_required(login_url='management_login')
 @require_POST
 def save_delivery_flow(request):
     """Persist delivery flow config for Delivery Flow Set (Total Order Received)."""
-    import json
     flows_raw = request.POST.get('flows') or '[]'
     try:
         flows = json.loads(flows_raw)
@@ -436,10 +457,8 @@ def save_delivery_flow(request):
     except Exception:
         return JsonResponse({'success': False, 'error': 'Invalid payload'}, status=400)
 
-    # Clear existing flows and recreate from payload
-    DeliveryFlow.objects.all().delete()
-    from datetime import datetime as _dt
-    created = 0
+    wanted = []
+    positions = []  # index in flows of each wanted entry
     for idx, flow in enumerate(flows):
         label = (flow.get('label') or '').strip()
         start = (flow.get('start') or '').strip()
@@ -447,20 +466,47 @@ def save_delivery_flow(request):
         if not (label and start and end):
             continue
         try:
-            start_time = _dt.strptime(start, '%H:%M').time()
-            end_time = _dt.strptime(end, '%H:%M').time()
+            start_time = datetime.strptime(start, '%H:%M').time()
+            end_time = datetime.strptime(end, '%H:%M').time()
         except ValueError:
             continue
-        DeliveryFlow.objects.create(
-            name=(flow.get('name') or '').strip() or f"Flow {idx+1}",
-            label=label,
-            start_time=start_time,
-            end_time=end_time,
-            status_text=(flow.get('statusText') or flow.get('status') or 'Approved').strip()[:255],
-            sort_order=idx,
-        )
-        created += 1
-    return JsonResponse({'success': True, 'count': created})
+        values = {
+            'name': (flow.get('name') or '').strip() or f"Flow {idx+1}",
+            'label': label,
+            'start_time': start_time,
+            'end_time': end_time,
+            'status_text': (flow.get('statusText') or flow.get('status') or 'Approved').strip()[:255],
+            'sort_order': idx,
+        }
+        if isinstance(flow.get('id'), int):
+            values['pk'] = flow['id']
+        wanted.append(values)
+        positions.append(idx)
+    # Called on every keystroke (debounced): rewrite only the flows that differ, in one transaction.
+    # Flows are matched by id, so a list keeps its flow when flows are inserted or reordered.
+    with transaction.atomic():
+        existing = DeliveryFlow.objects.order_by('sort_order', 'id')
+        windows_before = {
+            pk: window for pk, *window in existing.select_for_update().values_list('pk', 'start_time', 'end_time', 'sort_order')
+        }
+        rows, written = sync_rows_by_pk(
+            existing, wanted, ['name', 'label', 'start_time', 'end_time', 'status_text', 'sort_order'])
+        removed = windows_before.keys() - {row.pk for row in rows}
+        if written or removed:
+            bump_config_version(DELIVERY_FLOWS)
+            invalidate_flow_table()
+            # Renaming a flow or editing its status text leaves every list in its flow
+            if removed or any(windows_before.get(row.pk) != [row.start_time, row.end_time, row.sort_order] for row in rows):
+                # Lists handled in a removed flow lose it too (SET_NULL), so they move in the consolidated list
+                affected = MarketList.objects.filter(
+                    Q(status__in=ACTIVE_LIST_STATUSES) | Q(delivery_flow__in=removed)).values_list('pk', flat=True)
+                with consolidated_delta(affected):
+                    DeliveryFlow.objects.filter(pk__in=removed).delete()
+                    backfill_delivery_flows()
+    ids = [None] * len(flows)
+    for idx, row in zip(positions, rows):
+        ids[idx] = row.pk
+    return JsonResponse({'success': True, 'count': len(rows), 'ids': ids})
 
 
 @staff_member_required(login_url='management_login')
@@ -475,19 +521,13 @@ def save_send_status_presets(request):
     except Exception:
         return JsonResponse({'success': False, 'error': 'Invalid data'}, status=400)
 
-    # Replace all presets with new ordered list
-    SendStatusPreset.objects.all().delete()
-    bulk = []
-    order = 0
-    for txt in data:
-        txt = (txt or '').strip()
-        if not txt:
-            continue
-        bulk.append(SendStatusPreset(text=txt, sort_order=order))
-        order += 1
-    if bulk:
-        SendStatusPreset.objects.bulk_create(bulk)
-    return JsonResponse({'success': True, 'count': len(bulk)})
+    texts = [txt for txt in ((txt or '').strip() for txt in data) if txt]
+    wanted = [{'text': txt, 'sort_order': order} for order, txt in enumerate(texts)]
+    with transaction.atomic():
+        changes = sync_ordered_rows(SendStatusPreset.objects.order_by('sort_order', 'id'), wanted, ['text', 'sort_order'])
+        if any(changes):
+            bump_config_version(SEND_STATUS_PRESETS)
+    return JsonResponse({'success': True, 'count': len(wanted)})
 
 
 @staff_member_required(login_url='management_login')
@@ -502,123 +542,106 @@ def write_list_status(request):
     return JsonResponse({'success': True, 'status_text': status_text})
 
 
+def _format_section(s):
+    s = (s or '').strip()
+    if not s:
+        return ''
+    u = s.upper()
+    return u if u.startswith('SECTION') else f"SECTION-{u}"
+
+
+def _build_delivery_funnel(profiles, lists_by_user, pathway_keys):
+    """
+    Area -> Section -> Building -> Profiles tree for the Delivery Funnel, built in one
+    pass over the completed profiles. Only profiles with lists are kept; each level
+    carries its list count and whether its pathway has images.
+    """
+    tree = {}
+    for profile in profiles:
+        lists = lists_by_user.get(profile.user_id)
+        if not lists:
+            continue
+        area = (profile.area_name or '').strip()
+        section = (profile.section_no or '').strip()
+        building = (profile.building_name or '').strip()
+        if not area or not section or not building:
+            continue
+        profiles_by_uid = tree.setdefault(area, {}).setdefault(_format_section(section), {}).setdefault(building, {})
+        if profile.user_id not in profiles_by_uid:
+            profiles_by_uid[profile.user_id] = (
+                profile.user_id,
+                profile.display_name,
+                profile.phone or '',
+                (profile.floor_no or '').strip(),
+                (profile.room_no or '').strip(),
+                lists,
+            )
+
+    funnel = []
+    for area in sorted(tree):
+        secs = []
+        area_count = 0
+        for sec in sorted(tree[area]):
+            blds = []
+            sec_count = 0
+            for bld in sorted(tree[area][sec]):
+                profiles_data = sorted(tree[area][sec][bld].values(), key=lambda x: (x[1].upper(), x[0]))
+                bld_count = sum(len(p[5]) for p in profiles_data)
+                sec_count += bld_count
+                blds.append((bld, bld_count, profiles_data, (area, sec, bld) in pathway_keys))
+            area_count += sec_count
+            secs.append((sec, sec_count, blds, (area, sec, '') in pathway_keys))
+        funnel.append((area, area_count, secs, (area, '', '') in pathway_keys))
+    return funnel
+
+
 @staff_member_required(login_url='management_login')
 def user_directory(request):
     """User Profile & Delivery Path manager - vertical list of user blocks."""
-    all_profiles = FamilyProfile.objects.filter(is_deleted=False).select_related('user').order_by('user__username')
-    # Completed: all 5 delivery path fields filled
-    completed = all_profiles.exclude(
-        Q(area_name='') | Q(section_no='') | Q(building_name='') |
-        Q(floor_no='') | Q(room_no='')
-    )
-    # Pending: at least one field empty
-    pending = all_profiles.filter(
-        Q(area_name='') | Q(section_no='') | Q(building_name='') |
-        Q(floor_no='') | Q(room_no='')
-    )
-    completed_ids = set(completed.values_list('user_id', flat=True))
-    # Area -> Section -> Building -> Profiles (with approved lists only) for Delivery Funnel
-    def _format_section(s):
-        s = (s or '').strip()
-        if not s:
-            return ''
-        u = s.upper()
-        return u if u.startswith('SECTION') else f"SECTION-{u}"
+    all_profiles = list(FamilyProfile.objects.filter(is_deleted=False).select_related('user').order_by('user__username'))
+    # Completed: all 5 delivery path fields filled; Pending: at least one field empty
+    completed = [
+        p for p in all_profiles
+        if p.area_name and p.section_no and p.building_name and p.floor_no and p.room_no
+    ]
+    completed_ids = {p.user_id for p in completed}
 
     # Delivery Funnel: only APPROVED lists (5s auto approval) - delivered/declined excluded
+    flow_table = get_flow_table()
     lists_by_user = {}
-    for ml in MarketList.objects.filter(status='approved').select_related('family'):
+    approved = list(MarketList.objects.filter(status='approved'))
+    ai_lines = clean_lines_many(ml.ai_content for ml in approved)
+    orig_lines = clean_lines_many(ml.content for ml in approved)
+    for ml, ai_items, orig_items in zip(approved, ai_lines, orig_lines):
         uid = ml.family_id
         if uid not in lists_by_user:
             lists_by_user[uid] = []
-        ai_content = (ml.ai_content or '').strip()
-        orig_content = (ml.content or '').strip()
-        ai_items = [ln.strip() for ln in ai_content.splitlines() if ln.strip()] if ai_content else []
-        orig_items = [ln.strip() for ln in orig_content.splitlines() if ln.strip()] if orig_content else []
+        flow = flow_table.flow_by_id(ml.delivery_flow_id)
         lists_by_user[uid].append({
             'pk': ml.pk,
             'list_id': ml.list_id or f'Pack-{ml.pk}',
             'created_at': ml.created_at,
             'status': 'approved',
+            'flow_label': flow.label if flow is not None else '',
             'ai_items': ai_items,
             'orig_items': orig_items,
             'deliver_url': reverse('deliver_list', args=[ml.pk]),
             'decline_url': reverse('decline_list', args=[ml.pk]),
         })
 
-    area_data = {}
-    for profile in completed.select_related('user'):
-        area = (profile.area_name or '').strip()
-        section = (profile.section_no or '').strip()
-        building = (profile.building_name or '').strip()
-        if not area or not section or not building:
-            continue
-        uid = profile.user_id
-        sec_fmt = _format_section(section)
-        bld = building.strip()
-        key = (area, sec_fmt, bld)
-        if key not in area_data:
-            area_data[key] = {}
-        if uid not in area_data[key]:
-            area_data[key][uid] = (
-                profile.display_name,
-                profile.phone or '',
-                (profile.floor_no or '').strip(),
-                (profile.room_no or '').strip(),
-                lists_by_user.get(uid, []),
-            )
+    # (area, section, building) keys that have at least one pathway image, in one query
+    pathway_keys = set(
+        PathwayImage.objects.values_list('pathway__area_name', 'pathway__section_no', 'pathway__building_name').distinct()
+    )
+    area_sections_buildings_profiles_list = _build_delivery_funnel(completed, lists_by_user, pathway_keys)
 
-    def pathway_has_images(a, s, b):
-        return PathwayImage.objects.filter(
-            pathway__area_name=a, pathway__section_no=s or '', pathway__building_name=b or ''
-        ).exists()
-
-    area_sections_buildings_profiles_list = []
-    for area in sorted({k[0] for k in area_data.keys()}):
-        secs = []
-        area_count = 0
-        for sec in sorted({k[1] for k in area_data.keys() if k[0] == area}):
-            blds = []
-            sec_count = 0
-            for bld in sorted({k[2] for k in area_data.keys() if k[0] == area and k[1] == sec}):
-                key = (area, sec, bld)
-                raw_profiles = area_data[key]
-                profiles_data = []
-                for uid, (name, phone, floor, room, lists) in raw_profiles.items():
-                    if not lists:
-                        continue
-                    profiles_data.append((uid, name, phone, floor, room, lists))
-                if not profiles_data:
-                    continue
-                profiles_data.sort(key=lambda x: (x[1].upper(), x[0]))
-                bld_count = sum(len(lists) for _, _, _, _, _, lists in profiles_data)
-                if bld_count == 0:
-                    continue
-                sec_count += bld_count
-                blds.append((bld, bld_count, profiles_data, pathway_has_images(area, sec, bld)))
-            if sec_count == 0 or not blds:
-                continue
-            area_count += sec_count
-            secs.append((sec, sec_count, blds, pathway_has_images(area, sec, '')))
-        if area_count == 0 or not secs:
-            continue
-        area_sections_buildings_profiles_list.append((area, area_count, secs, pathway_has_images(area, '', '')))
-
-    # Delivery Flow configuration (same as admin dashboard) – used to tag lists in Delivery Funnel
-    delivery_flows_qs = DeliveryFlow.objects.all().order_by('sort_order', 'id')
-    delivery_flows = []
-    for idx, f in enumerate(delivery_flows_qs, 1):
-        delivery_flows.append({
-            'name': f.name or f"Flow {idx}",
-            'label': f.label,
-            'start': f.start_time.strftime('%H:%M'),
-            'end': f.end_time.strftime('%H:%M'),
-        })
+    # Delivery Flow configuration (same as admin dashboard) – used by the funnel timing filter
+    delivery_flows = flow_table.as_dicts()
 
     return render(request, 'shop/user_directory.html', {
         'profiles': all_profiles,
-        'completed_count': completed.count(),
-        'pending_count': pending.count(),
+        'completed_count': len(completed),
+        'pending_count': len(all_profiles) - len(completed),
         'completed_ids': completed_ids,
         'area_sections_buildings_profiles_list': area_sections_buildings_profiles_list,
         'delivery_flows': delivery_flows,
@@ -678,26 +701,39 @@ def update_address(request, user_id):
     return JsonResponse({'success': True, 'address': profile.address})
 
 
+def _storage_url(name):
+    return default_storage.url(name) if name else ''
+
+
 @staff_member_required(login_url='management_login')
 @require_GET
 def pathway_images(request):
-    """Get pathway images for area/section/building. Returns JSON."""
+    """Get pathway images for area/section/building. Returns JSON. Read-only: one query, no Pathway row created."""
     area = (request.GET.get('area') or '').strip()
     section = (request.GET.get('section') or '').strip()
     building = (request.GET.get('building') or '').strip()
     if not area:
         return JsonResponse({'success': False, 'error': 'Area required'}, status=400)
-    pathway, _ = Pathway.objects.get_or_create(
-        area_name=area,
-        section_no=section,
-        building_name=building,
-        defaults={'area_name': area, 'section_no': section, 'building_name': building}
-    )
-    images = list(pathway.images.order_by('position').values('id', 'position', 'note'))
-    for img in images:
-        pi = PathwayImage.objects.get(pk=img['id'])
-        img['url'] = pi.image.url if pi.image else ''
-    return JsonResponse({'success': True, 'images': images, 'pathway_id': pathway.pk})
+    rows = PathwayImage.objects.filter(
+        pathway__area_name=area, pathway__section_no=section, pathway__building_name=building,
+    ).order_by('position').values('id', 'position', 'note', 'image', 'thumbnail', 'width', 'height', 'pathway_id')
+    images = []
+    pathway_id = None
+    for row in rows:
+        pathway_id = row.pop('pathway_id')
+        url = _storage_url(row.pop('image'))
+        row['url'] = url
+        row['thumbnail_url'] = _storage_url(row.pop('thumbnail')) or url
+        images.append(row)
+    return JsonResponse({'success': True, 'images': images, 'pathway_id': pathway_id})
+
+
+def _save_pathway_thumbnail(pi):
+    """Generate thumbnail + dimensions for a just-saved PathwayImage."""
+    result = pathway_thumbnail(pi.image.name)
+    if result:
+        pi.thumbnail, pi.width, pi.height = result
+        pi.save(update_fields=['thumbnail', 'width', 'height'])
 
 
 @staff_member_required(login_url='management_login')
@@ -724,11 +760,15 @@ def pathway_upload(request):
     max_pos = pathway.images.aggregate(m=Max('position'))['m']
     position = (max_pos or -1) + 1
     pi = PathwayImage.objects.create(pathway=pathway, image=img_file, position=position)
+    _save_pathway_thumbnail(pi)
     return JsonResponse({
         'success': True,
         'id': pi.id,
         'position': position,
         'url': pi.image.url,
+        'thumbnail_url': pi.thumbnail.url if pi.thumbnail else pi.image.url,
+        'width': pi.width,
+        'height': pi.height,
     })
 
 
@@ -748,6 +788,7 @@ def pathway_update_note(request, image_id):
 def pathway_delete(request, image_id):
     """Delete a pathway image."""
     pi = get_object_or_404(PathwayImage, pk=image_id)
+    pi.thumbnail.delete(save=False)
     pi.delete()
     return JsonResponse({'success': True})
 
@@ -763,8 +804,17 @@ def pathway_replace(request, image_id):
     if img_file.size > 600 * 1024:
         return JsonResponse({'success': False, 'error': 'Image too large (max 500KB after compression)'}, status=400)
     pi.image = img_file
+    pi.thumbnail.delete(save=False)
+    pi.width = pi.height = None
     pi.save()
-    return JsonResponse({'success': True, 'url': pi.image.url})
+    _save_pathway_thumbnail(pi)
+    return JsonResponse({
+        'success': True,
+        'url': pi.image.url,
+        'thumbnail_url': pi.thumbnail.url if pi.thumbnail else pi.image.url,
+        'width': pi.width,
+        'height': pi.height,
+    })
 
 
 @staff_member_required(login_url='management_login')
@@ -835,7 +885,8 @@ def permanent_delete_profile(request, user_id):
     if not profile.is_deleted:
         return redirect('user_profiles')
     username = user.username
-    user.delete()  # Cascades to FamilyProfile
+    with consolidated_delta(user.market_lists.values_list('pk', flat=True)):
+        user.delete()  # Cascades to FamilyProfile
     return redirect('user_profiles')
 
 
@@ -888,7 +939,9 @@ def approve_list(request, pk):
     if market_list.status == 'pending':
         market_list.status = 'approved'
         market_list.approved_at = timezone.now()
-        market_list.save()
+        with consolidated_delta([market_list.pk]):
+            market_list.save()
+        publish_list_status(market_list)
     ref = request.META.get('HTTP_REFERER')
     return redirect(ref if ref else 'management_dashboard')
 
@@ -899,7 +952,9 @@ def revert_to_pending(request, pk):
     if market_list.status == 'approved':
         market_list.status = 'pending'
         market_list.approved_at = None
-        market_list.save()
+        with consolidated_delta([market_list.pk]):
+            market_list.save()
+        publish_list_status(market_list)
     ref = request.META.get('HTTP_REFERER')
     return redirect(ref if ref else 'management_dashboard')
 
@@ -910,7 +965,9 @@ def decline_list(request, pk):
     if market_list.status in ('pending', 'approved'):
         market_list.status = 'declined'
         market_list.declined_at = timezone.now()
-        market_list.save()
+        with consolidated_delta([market_list.pk]):
+            market_list.save()
+        publish_list_status(market_list)
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({'success': True, 'status': 'declined'})
     ref = request.META.get('HTTP_REFERER')
@@ -923,7 +980,9 @@ def deliver_list(request, pk):
     if market_list.status == 'approved':
         market_list.status = 'delivered'
         market_list.delivered_at = timezone.now()
-        market_list.save()
+        with consolidated_delta([market_list.pk]):
+            market_list.save()
+        publish_list_status(market_list)
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({'success': True, 'status': 'delivered'})
     ref = request.META.get('HTTP_REFERER')
@@ -939,17 +998,79 @@ def restore_list(request, pk):
         market_list.approved_at = timezone.now()
         market_list.delivered_at = None
         market_list.declined_at = None
-        market_list.save()
+        with consolidated_delta([market_list.pk]):
+            market_list.save()
+        publish_list_status(market_list)
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({'success': True, 'status': 'approved'})
     ref = request.META.get('HTTP_REFERER')
     return redirect(ref if ref else 'management_dashboard')
 
 
+# Target status -> (statuses it may be reached from, timestamps set to now, timestamps cleared);
+# the same moves approve_list / revert_to_pending / decline_list / deliver_list / restore_list make
+LIST_TRANSITIONS = {
+    'approved': (('pending', 'delivered', 'declined'), ('approved_at',), ('delivered_at', 'declined_at')),
+    'pending': (('approved',), (), ('approved_at',)),
+    'declined': (('pending', 'approved'), ('declined_at',), ()),
+    'delivered': (('approved',), ('delivered_at',), ()),
+}
+BULK_STATUS_MAX_LISTS = 500
+
+
+@staff_member_required(login_url='management_login')
+@require_POST
+def bulk_list_status(request):
+    """
+    Move many lists to one status (approve / revert / decline / deliver / restore).
+    POST status and pks (JSON array). Lists whose current status allows the move
+    are updated with one conditional UPDATE; results says, per pk, whether it
+    moved and the status it has now (null if there is no such list).
+    """
+    target = request.POST.get('status', '')
+    if target not in LIST_TRANSITIONS:
+        return JsonResponse({'success': False, 'error': 'Invalid status'}, status=400)
+    try:
+        pks = json.loads(request.POST.get('pks') or '[]')
+        if not isinstance(pks, list):
+            raise ValueError
+        pks = list(dict.fromkeys(int(pk) for pk in pks))
+    except (TypeError, ValueError):
+        return JsonResponse({'success': False, 'error': 'Invalid payload'}, status=400)
+    if len(pks) > BULK_STATUS_MAX_LISTS:
+        return JsonResponse({'success': False, 'error': f'At most {BULK_STATUS_MAX_LISTS} lists at once'}, status=400)
+    sources, stamped, cleared = LIST_TRANSITIONS[target]
+    now = timezone.now()
+    with consolidated_delta(pks):
+        # Lock the rows so the statuses read here are the ones the UPDATE sees
+        current = {
+            row['pk']: row for row in
+            MarketList.objects.select_for_update().filter(pk__in=pks).values('pk', 'list_id', 'status', 'family_id')
+        }
+        changed = [row for row in current.values() if row['status'] in sources]
+        moved = MarketList.objects.filter(pk__in=[row['pk'] for row in changed], status__in=sources).update(
+            status=target, **dict.fromkeys(stamped, now), **dict.fromkeys(cleared)
+        )
+        for row in changed:
+            row['status'] = target
+        publish_list_statuses(changed)
+    changed_pks = {row['pk'] for row in changed}
+    return JsonResponse({
+        'success': True,
+        'status': target,
+        'updated': moved,
+        'results': {
+            str(pk): {'ok': pk in changed_pks, 'status': current[pk]['status'] if pk in current else None}
+            for pk in pks
+        },
+    })
+
+
 @staff_member_required(login_url='management_login')
 def admin_delete_list(request, pk):
     market_list = get_object_or_404(MarketList, pk=pk)
-    market_list.delete()
+    with consolidated_delta([market_list.pk]):
+        market_list.delete()
     ref = request.META.get('HTTP_REFERER')
     return redirect(ref if ref else 'management_dashboard')
 
@@ -962,7 +1083,7 @@ def admin_edit_list(request, pk):
     if request.method == 'POST':
         form = AdminMarketListEditForm(request.POST, instance=market_list)
         if form.is_valid():
-            form.save()
+            sync_list_items(form.save())
             return redirect(reverse('management_dashboard') + '?filter=' + back_filter)
     else:
         form = AdminMarketListEditForm(instance=market_list)
@@ -973,108 +1094,23 @@ def admin_edit_list(request, pk):
     })
 
 
-def _ai_organize_list(content):
-    """AI-style organization: clean lines, remove dupes, number with Bengali numerals."""
-    if not content or not content.strip():
-        return content or ""
-    bengali_digits = '০১২৩৪৫৬৭৮৯'
-    lines = [ln.strip() for ln in content.splitlines() if ln.strip()]
-    seen = set()
-    unique = []
-    for ln in lines:
-        key = ln.lower().strip()
-        if key and key not in seen:
-            seen.add(key)
-            unique.append(ln)
-    result = []
-    for i, ln in enumerate(unique, 1):
-        num = ''.join(bengali_digits[int(d)] for d in str(i))
-        result.append(f"{num}. {ln}")
-    return '\n'.join(result)
+def _normalize_list_filter(filter_status):
+    """'approved' / 'pending' / 'total' (anything else) for the list-entry filter param."""
+    return filter_status if filter_status in ('approved', 'pending') else 'total'
 
 
 @staff_member_required(login_url='management_login')
 def list_entry_all_pdf(request):
     """Download all lists from list entry as a single PDF. Uses fpdf2 for proper Bengali font."""
-    filter_status = request.GET.get('filter', 'total')
-    lists = MarketList.objects.all().select_related('family')
-    if filter_status == 'approved':
-        lists = lists.filter(status='approved')
-    elif filter_status == 'pending':
-        lists = lists.filter(status='pending')
-    for lst in lists:
-        try:
-            lst.user_display_name = lst.family.family_profile.display_name or lst.family.username
-        except FamilyProfile.DoesNotExist:
-            lst.user_display_name = lst.family.username
-
-    from .pdf_utils import generate_list_entry_pdf_fpdf2
-    pdf_bytes = generate_list_entry_pdf_fpdf2(list(lists))
-    if pdf_bytes:
-        response = HttpResponse(bytes(pdf_bytes), content_type='application/pdf')
-        response['Content-Disposition'] = 'attachment; filename="list-entry-all.pdf"'
-        return response
-
-    try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib.units import cm
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-        from .pdf_utils import get_pdf_styles, safe_paragraph, safe_paragraph_bold
-        from io import BytesIO
-    except ImportError:
+    from .pdf_utils import list_entry_pdf_bytes
+    pdf_bytes = list_entry_pdf_bytes(list_entry_lists(_normalize_list_filter(request.GET.get('filter', 'total'))))
+    if pdf_bytes is None:
         return HttpResponse('PDF জেনারেট করতে reportlab ইনস্টল করুন', status=501)
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
-    st = get_pdf_styles()
-    story = []
-    story.append(safe_paragraph(st['title'], 'লিস্ট এন্ট্রি - সব লিস্ট (পিডিএফ)'))
-    story.append(Spacer(1, 16))
-    for idx, lst in enumerate(lists, 1):
-        name = getattr(lst, 'user_display_name', lst.family.username)
-        story.append(safe_paragraph_bold(st['heading'], f'সিরিয়াল: {idx} | লিস্ট: {lst.list_id} | ব্যবহারকারী: {name}'))
-        story.append(safe_paragraph(st['body'], f'তারিখ: {lst.created_at.strftime("%d/%m/%Y %H:%M") if lst.created_at else "-"}'))
-        story.append(safe_paragraph_bold(st['body'], 'মূল লিস্ট:'))
-        story.append(safe_paragraph(st['body'], lst.content or '—'))
-        if lst.ai_content:
-            story.append(safe_paragraph_bold(st['body'], 'AI লিস্ট:'))
-            story.append(safe_paragraph(st['body'], lst.ai_content))
-        story.append(Spacer(1, 14))
-    doc.build(story)
-    buffer.seek(0)
-    response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="list-entry-all.pdf"'
-    return response
-
-
-def _strip_number_prefix(line):
-    """Remove leading '১. ' or '1. ' style prefix from line."""
-    import re
-    return re.sub(r'^[\d০-৯]+[.\s]+', '', line).strip()
-
+    return FileResponse(BytesIO(pdf_bytes), as_attachment=True, filename='list-entry-all.pdf', content_type='application/pdf')
 
-def _number_with_bengali(lines):
-    """Number lines with Bengali numerals. Keeps duplicates (same point can appear multiple times)."""
-    if not lines:
-        return []
-    bengali_digits = '০১২৩৪৫৬৭৮৯'
-    result = []
-    for i, ln in enumerate(lines, 1):
-        num = ''.join(bengali_digits[int(d)] for d in str(i))
-        result.append(f"{num}. {ln}")
-    return result
 
-
-def _get_merged_items_from_lists(lists):
-    """Merge all AI list lines from lists. Same points listed multiple times (no dedupe)."""
-    all_lines = []
-    for lst in lists:
-        src = lst.ai_content or ''
-        if src:
-            for line in src.strip().splitlines():
-                line = _strip_number_prefix(line.strip())
-                if line:
-                    all_lines.append(line)
-    return _number_with_bengali(all_lines) if all_lines else []
+# Statuses the dashboard's Total view shows (delivered/declined move out once handled)
+ACTIVE_LIST_STATUSES = ('pending', 'approved')
 
 
 @staff_member_required(login_url='management_login')
@@ -1117,67 +1153,89 @@ def list_entry_user_view(request):
 
 @staff_member_required(login_url='management_login')
 def list_entry_consolidated(request):
-    """Consolidated list: all market list points merged, one list with Bengali numbering."""
+    """Consolidated list: every item across the lists with its total quantity, Bengali numbering."""
     filter_status = request.GET.get('filter', 'total')
-    lists = MarketList.objects.all().select_related('family')
-    if filter_status == 'approved':
-        lists = lists.filter(status='approved')
-    elif filter_status == 'pending':
-        lists = lists.filter(status='pending')
-    merged_lines = _get_merged_items_from_lists(list(lists))
+    flow = request.GET.get('flow', '')
     return render(request, 'shop/list_entry_consolidated.html', {
-        'merged_items': merged_lines,
+        'merged_items': consolidated_lines(_normalize_list_filter(filter_status), int(flow) if flow.isdigit() else None),
         'filter_status': filter_status,
     })
 
 
 @staff_member_required(login_url='management_login')
 def list_entry_consolidated_pdf(request):
-    """Download consolidated list as PDF."""
-    filter_status = request.GET.get('filter', 'total')
-    lists = MarketList.objects.all().select_related('family')
-    if filter_status == 'approved':
-        lists = lists.filter(status='approved')
-    elif filter_status == 'pending':
-        lists = lists.filter(status='pending')
-    merged_lines = _get_merged_items_from_lists(list(lists))
-    from .pdf_utils import generate_consolidated_pdf_fpdf2
-    from datetime import date
+    """Download consolidated list as PDF (cached on disk per content; ETag for repeat downloads)."""
+    filter_status = _normalize_list_filter(request.GET.get('filter', 'total'))
+    merged_lines = consolidated_lines(filter_status)
+    from .pdf_utils import pdf_cache_key, get_cached_pdf, store_cached_pdf, consolidated_pdf_bytes
     dt = date.today()
-    pdf_bytes = generate_consolidated_pdf_fpdf2(merged_lines, dt, title='Consolidated List', pre_numbered=True)
-    if pdf_bytes:
-        response = HttpResponse(bytes(pdf_bytes), content_type='application/pdf')
-        response['Content-Disposition'] = 'attachment; filename="consolidated-list.pdf"'
+    # Same lines + filter + date => same file; any list change alters the lines and the key
+    key = pdf_cache_key(filter_status, dt.isoformat(), *merged_lines)
+    etag = f'"{key}"'
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
         return response
+    prefix = f'consolidated-{filter_status}'
+    path = get_cached_pdf(prefix, key)
     try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib.units import cm
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-        from .pdf_utils import get_pdf_styles, safe_paragraph
-        from io import BytesIO
-    except ImportError:
-        return HttpResponse('PDF জেনারেট করতে reportlab ইনস্টল করুন', status=501)
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
-    st = get_pdf_styles()
-    story = [safe_paragraph(st['title'], 'সম্মিলিত লিস্ট'), Spacer(1, 16)]
-    for line in merged_lines:
-        story.append(safe_paragraph(st['body'], line))
-        story.append(Spacer(1, 4))
-    doc.build(story)
-    buffer.seek(0)
-    response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="consolidated-list.pdf"'
+        body = open(path, 'rb') if path else None
+    except OSError:
+        # Removed after the check by a concurrent store_cached_pdf for newer content
+        body = None
+    if body is None:
+        pdf_bytes = consolidated_pdf_bytes(merged_lines, dt)
+        if pdf_bytes is None:
+            return HttpResponse('PDF জেনারেট করতে reportlab ইনস্টল করুন', status=501)
+        store_cached_pdf(prefix, key, pdf_bytes)
+        # Served from memory: the stored file can be replaced just as well before we open it
+        body = BytesIO(bytes(pdf_bytes))
+    response = FileResponse(body, as_attachment=True, filename='consolidated-list.pdf', content_type='application/pdf')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
     return response
 
 
+@staff_member_required(login_url='management_login')
+@require_POST
+def export_enqueue(request, kind):
+    """Queue a PDF export for the worker; the page polls status_url."""
+    if kind not in EXPORT_KINDS:
+        return JsonResponse({'success': False, 'error': 'Unknown export'}, status=404)
+    job = enqueue_export(kind, {'filter': _normalize_list_filter(request.POST.get('filter', 'total'))}, request.user)
+    return JsonResponse({'success': True, 'job_id': job.pk, 'status_url': reverse('export_job_status', args=[job.pk])})
+
+
+@staff_member_required(login_url='management_login')
+@require_GET
+def export_job_status(request, job_id):
+    job = get_object_or_404(ExportJob, pk=job_id)
+    data = {'success': True, 'job_id': job.pk, 'status': job.status}
+    if job.status == 'done':
+        data['download_url'] = reverse('export_job_download', args=[job.pk])
+    elif job.status == 'failed':
+        data['error'] = 'এক্সপোর্ট ব্যর্থ হয়েছে'
+    return JsonResponse(data)
+
+
+@staff_member_required(login_url='management_login')
+@require_GET
+def export_job_download(request, job_id):
+    job = get_object_or_404(ExportJob, pk=job_id)
+    path = export_file_path(job)
+    if path is None:
+        raise Http404('Export not ready')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=EXPORT_KINDS[job.kind][0], content_type='application/pdf')
+
+
 @staff_member_required(login_url='management_login')
 @require_GET
 def ai_generate_list(request, pk):
     market_list = get_object_or_404(MarketList, pk=pk)
-    generated = _ai_organize_list(market_list.content)
+    generated = organize_list(market_list.content)
     market_list.ai_content = generated
     market_list.save(update_fields=['ai_content'])
+    sync_list_items(market_list)
     return JsonResponse({'success': True, 'content': generated})
 
 
@@ -1215,20 +1273,21 @@ def _get_or_create_conversation(user):
     return conv
 
 
+INBOX_PAGE_SIZE = 30
+
+
 @login_required
 def messaging_inbox(request):
     """Staff: list all conversations. User: redirect to own thread."""
     if not request.user.is_staff:
         conv = _get_or_create_conversation(request.user)
         return redirect('messaging_thread', user_id=request.user.id)
-    conversations = Conversation.objects.all().select_related('user').order_by('-id')
-    # Add last message and unread count per conversation
-    conv_list = []
-    for c in conversations:
-        last = c.messages.order_by('-created_at').first()
-        unread = c.messages.filter(read_at__isnull=True).exclude(sender=c.user).count()
-        conv_list.append({'conv': c, 'last_message': last, 'unread': unread})
-    return render(request, 'shop/messaging_inbox.html', {'conversations': conv_list})
+    # Counters are kept on Conversation, so the inbox is a plain indexed read
+    conversations = Conversation.objects.select_related('user').order_by(
+        F('last_message_at').desc(nulls_last=True), '-id'
+    )
+    page_obj = Paginator(conversations, INBOX_PAGE_SIZE).get_page(request.GET.get('page'))
+    return render(request, 'shop/messaging_inbox.html', {'conversations': page_obj, 'page_obj': page_obj})
 
 
 @login_required
@@ -1239,7 +1298,7 @@ def messaging_thread(request, user_id):
         return redirect('family_dashboard')
     conv = _get_or_create_conversation(target_user)
     # Mark messages received by current user as read
-    conv.messages.exclude(sender=request.user).filter(read_at__isnull=True).update(read_at=timezone.now())
+    conv.mark_read(request.user)
     msgs = conv.messages.select_related('sender').order_by('created_at')
     form = MessageForm()
     if request.method == 'POST':
@@ -1264,4 +1323,28 @@ def message_unread_count(request):
     return JsonResponse({'unread': count})
 
 
+@login_required
+@require_GET
+async def event_stream(request):
+    """SSE push channel (served through easyShop/asgi.py): unread counts, new messages, list status changes."""
+    if not isinstance(request, ASGIRequest):
+        # An endless stream would hold a WSGI worker thread for as long as the page is open;
+        # 204 tells EventSource not to reconnect, and pages keep working without live updates
+        return HttpResponse(status=204)
+    user = await request.auser()
+    if user.is_staff:
+        channels = [STAFF]
+        snapshot = {'unread': (await Conversation.objects.aaggregate(n=Sum('unread_for_staff')))['n'] or 0}
+    else:
+        channels = [user.pk]
+        count = await Conversation.objects.filter(user=user).values_list('unread_for_user', flat=True).afirst()
+        snapshot = {'unread': count or 0}
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    last_event_id = int(last_event_id) if last_event_id.isdigit() else None
+    response = StreamingHttpResponse(stream_events(channels, last_event_id, snapshot), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # --- Notice (already in dashboard; update via management_dashboard form)